@@ -1,28 +1,71 @@
 import pandas as pd
 import numpy as np
+import os
+import sys
 
-# 1. Cargar ambos datasets reales
-df_gaia = pd.read_csv('resultados_mfsu_gaia.csv')
-df_fermi = pd.read_csv('fermi_events_raw.csv')
+# Índice de radios compartido (raíz del repositorio).
+# La ruta sólo se añade al ejecutar el archivo como script; al
+# importarlo como módulo, core ya debe ser importable.
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from core.radius_index import RadiusIndex
+from core.registers import read_register, write_register
+from core.cache import ResultCache
+from core.metrics import span, export_from_env
 
-# 2. El Cruce: Vamos a mapear los eventos de Fermi sobre el gradiente de Gaia
-# Para este análisis, asumimos que los GRBs están distribuidos y su luz 
-# atraviesa diferentes "espesores" de la red de espín.
-df_fermi['distancia_recorrida_kpc'] = np.random.uniform(5, 25, len(df_fermi))
+CHI = 12.65
 
-# Buscamos el delta_F correspondiente en el mapa de Gaia para esa distancia
-def obtener_delta_contextual(r):
-    # Buscamos el punto más cercano en nuestro mapa de 1000 eventos de Gaia
-    idx = (df_gaia['radius_kpc'] - r).abs().idxmin()
-    return df_gaia.loc[idx, 'delta_F_calculado']
+@span('fermi.merge', items=lambda df_fermi, *a, **k: len(df_fermi))
+def cruzar_fermi_gaia(df_fermi, df_gaia, interpolar=False):
+    """
+    Asigna a cada GRB el delta_F del mapa de Gaia a su distancia recorrida.
 
-df_fermi['delta_F_red'] = df_fermi['distancia_recorrida_kpc'].apply(obtener_delta_contextual)
+    El índice de radios se construye una sola vez y todos los eventos se
+    resuelven en una consulta vectorizada (mismo resultado que buscar el
+    punto más cercano con idxmin evento a evento). Con `interpolar=True`
+    se interpola delta_F entre los dos radios vecinos.
+    """
+    indice = RadiusIndex(df_gaia['radius_kpc'], df_gaia['delta_F_calculado'])
+    df_fermi['delta_F_red'] = indice.lookup(df_fermi['distancia_recorrida_kpc'], interpolate=interpolar)
 
-# 3. Cálculo de la Energía Corregida por Impedancia (Matemática Real)
-# E_emitida = E_obs / (12.65^(1 - delta_F))
-CHI = 12.65
-df_fermi['E_fuente_estimada'] = df_fermi['e_peak_kev'] / (CHI**(1 - df_fermi['delta_F_red']))
+    # 3. Cálculo de la Energía Corregida por Impedancia (Matemática Real)
+    # E_emitida = E_obs / (12.65^(1 - delta_F))
+    df_fermi['E_fuente_estimada'] = df_fermi['e_peak_kev'] / (CHI**(1 - df_fermi['delta_F_red']))
+    return df_fermi
+
+def etapa_cruce(ruta_gaia, ruta_fermi):
+    # 1. Cargar ambos datasets reales (sólo las columnas de Gaia que usa el cruce)
+    df_gaia = read_register(ruta_gaia, columns=['radius_kpc', 'delta_F_calculado'])
+    with span('fermi.io.read') as s:
+        df_fermi = pd.read_csv(ruta_fermi)
+        s.items = len(df_fermi)
+
+    # 2. El Cruce: Vamos a mapear los eventos de Fermi sobre el gradiente de Gaia
+    # Para este análisis, asumimos que los GRBs están distribuidos y su luz
+    # atraviesa diferentes "espesores" de la red de espín.
+    df_fermi['distancia_recorrida_kpc'] = np.random.uniform(5, 25, len(df_fermi))
+
+    # Buscamos el delta_F correspondiente en el mapa de Gaia para esa distancia
+    df_fermi = cruzar_fermi_gaia(df_fermi, df_gaia)
+
+    # 4. Guardar el Master Dataset (CSV para el paper + registro binario)
+    with span('fermi.io.write', items=len(df_fermi)):
+        df_fermi.to_csv('master_cruce_gaia_fermi.csv', index=False)
+    write_register(df_fermi, 'master_cruce_gaia_fermi.npcol')
+    return df_fermi
+
+if __name__ == "__main__":
+    # Registro binario de Gaia si existe, si no el CSV
+    ruta_gaia = 'resultados_mfsu_gaia.npcol'
+    if not os.path.exists(ruta_gaia):
+        ruta_gaia = 'resultados_mfsu_gaia.csv'
 
-# 4. Guardar el Master Dataset
-df_fermi.to_csv('master_cruce_gaia_fermi.csv', index=False)
-print("¡Cruce completado! Archivo 'master_cruce_gaia_fermi.csv' listo para el paper.")
+    # Con las mismas entradas y constantes se reutiliza el cruce anterior
+    # (incluidas las distancias sorteadas)
+    df_fermi = ResultCache().call(
+        'fermi_gaia_merge', etapa_cruce, ruta_gaia, 'fermi_events_raw.csv',
+        inputs=[ruta_gaia, 'fermi_events_raw.csv'], params={'CHI': CHI},
+        outputs=['master_cruce_gaia_fermi.csv', 'master_cruce_gaia_fermi.npcol'],
+    )
+    print("¡Cruce completado! Archivo 'master_cruce_gaia_fermi.csv' listo para el paper.")
+    export_from_env()
@@ -1,28 +1,170 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+
+# E/S binaria de registros y caché compartidas (raíz del repositorio).
+# La ruta sólo se añade al ejecutar el archivo como script; al
+# importarlo como módulo, core ya debe ser importable.
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from core.registers import write_register
+from core.cache import ResultCache
+from core.metrics import span, export_from_env
 
 # Constantes MFSU
 CHI = 12.65
 PAUSA_FRANCO = 0.921
 
-def analizar_mfsu_gaia(path):
-    df = pd.read_csv(path)
-    
+def calcular_delta_f(df):
     # MATEMÁTICA REAL MFSU
     # Despejamos delta_F: Vobs = Vbar * CHI^(1-delta_F)
-    df['delta_F_calculado'] = 1 - (np.log(df['v_obs_kms'] / df['v_bar_kms']) / np.log(CHI))
-    
-    # Guardar resultados procesados
-    df.to_csv('resultados_mfsu_gaia.csv', index=False)
-    
-    # Resumen Estadístico
-    mean_delta = df['delta_F_calculado'].mean()
-    print(f"Análisis completado para {len(df)} eventos.")
+    return 1 - (np.log(df['v_obs_kms'] / df['v_bar_kms']) / np.log(CHI))
+
+def resumen_delta_f(valores):
+    """
+    Media de delta_F sobre los valores finitos y número de valores excluidos
+    (NaN o ±inf, p. ej. con V_bar o V_obs nulas). Es la misma regla que
+    aplica EstadisticaDeltaF en la versión por bloques.
+    """
+    valores = np.asarray(valores, dtype=float)
+    finitos = valores[np.isfinite(valores)]
+    media = finitos.mean() if len(finitos) else np.nan
+    return media, len(valores) - len(finitos)
+
+def imprimir_resumen(n_eventos, mean_delta, n_excluidos=0):
+    print(f"Análisis completado para {n_eventos} eventos.")
+    if n_excluidos:
+        print(f"Excluidos del resumen (delta_F no finito): {n_excluidos}")
     print(f"Valor medio de delta_F: {mean_delta:.4f}")
     print(f"Desviación respecto a la Pausa de Franco (0.921): {mean_delta - PAUSA_FRANCO:.4f}")
-    
+
+def analizar_mfsu_gaia(path, verbose=False):
+    with span('gaia.io.read') as s:
+        df = pd.read_csv(path)
+        s.items = len(df)
+
+    with span('gaia.delta_f', items=len(df)):
+        df['delta_F_calculado'] = calcular_delta_f(df)
+
+    # Guardar resultados procesados
+    with span('gaia.io.write', items=len(df)):
+        df.to_csv('resultados_mfsu_gaia.csv', index=False)
+
+    # Resumen Estadístico
+    if verbose:
+        imprimir_resumen(len(df), *resumen_delta_f(df['delta_F_calculado']))
+
     return df
 
+class EstadisticaDeltaF:
+    """
+    Agregados acumulativos de delta_F con memoria constante: conteo, media y
+    varianza (Welford / Chan al fusionar bloques), mínimo, máximo e histograma
+    con bordes fijos. Los valores NaN o infinitos se cuentan aparte.
+    """
+
+    def __init__(self, bordes_hist=np.linspace(0.0, 1.5, 151)):
+        self.bordes_hist = np.asarray(bordes_hist, dtype=float)
+        self.hist = np.zeros(len(self.bordes_hist) - 1, dtype=np.int64)
+        self.fuera_rango = 0
+        self.n_filas = 0
+        self.n_invalidos = 0
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+
+    def actualizar(self, valores):
+        valores = np.asarray(valores, dtype=float)
+        self.n_filas += len(valores)
+        finitos = valores[np.isfinite(valores)]
+        self.n_invalidos += len(valores) - len(finitos)
+        if len(finitos) == 0:
+            return
+
+        # Fusión de (n, media, M2) del bloque con el acumulado (Chan et al.)
+        n_b = len(finitos)
+        media_b = finitos.mean()
+        m2_b = np.sum((finitos - media_b)**2)
+        n = self.n + n_b
+        delta = media_b - self.media
+        self.media += delta * n_b / n
+        self.m2 += m2_b + delta**2 * self.n * n_b / n
+        self.n = n
+
+        self.minimo = min(self.minimo, finitos.min())
+        self.maximo = max(self.maximo, finitos.max())
+        conteo, _ = np.histogram(finitos, bins=self.bordes_hist)
+        self.hist += conteo
+        self.fuera_rango += n_b - conteo.sum()
+
+    def resumen(self):
+        varianza = self.m2 / (self.n - 1) if self.n > 1 else np.nan
+        return {
+            'n_filas': self.n_filas,
+            'n_validos': self.n,
+            'n_invalidos': self.n_invalidos,
+            'media': self.media if self.n else np.nan,
+            'varianza': varianza,
+            'desviacion': np.sqrt(varianza),
+            'minimo': self.minimo,
+            'maximo': self.maximo,
+            'hist': self.hist,
+            'bordes_hist': self.bordes_hist,
+            'fuera_rango_hist': self.fuera_rango,
+        }
+
+def analizar_mfsu_gaia_streaming(path, salida='resultados_mfsu_gaia.csv', chunksize=1_000_000,
+                                 bordes_hist=np.linspace(0.0, 1.5, 151), verbose=False):
+    """
+    Versión por bloques de analizar_mfsu_gaia para catálogos que no caben en RAM.
+    Lee `chunksize` filas cada vez, añade delta_F_calculado al archivo de salida
+    y mantiene agregados acumulativos; la memoria no depende del tamaño del catálogo.
+    Devuelve el resumen estadístico (ver EstadisticaDeltaF).
+    """
+    estadistica = EstadisticaDeltaF(bordes_hist)
+    cabecera = True
+    # La salida se vacía antes de leer: con un catálogo vacío (o ilegible)
+    # no queda el resultado de una ejecución anterior
+    open(salida, 'w').close()
+
+    lector = pd.read_csv(path, chunksize=chunksize)
+    while True:
+        with span('gaia.io.read') as s:
+            bloque = next(lector, None)
+            s.items = 0 if bloque is None else len(bloque)
+        if bloque is None:
+            break
+        with span('gaia.delta_f', items=len(bloque)):
+            bloque['delta_F_calculado'] = calcular_delta_f(bloque)
+            estadistica.actualizar(bloque['delta_F_calculado'].to_numpy())
+        with span('gaia.io.write', items=len(bloque)):
+            bloque.to_csv(salida, mode='a', header=cabecera, index=False)
+        cabecera = False
+
+    resumen = estadistica.resumen()
+    if verbose:
+        imprimir_resumen(resumen['n_filas'], resumen['media'], resumen['n_invalidos'])
+
+    return resumen
+
+def etapa_gaia(path):
+    analisis = analizar_mfsu_gaia(path)
+    # Copia binaria tipada para las etapas siguientes (cruce con Fermi)
+    write_register(analisis, 'resultados_mfsu_gaia.npcol')
+    return analisis
+
 # Ejecutar
-analisis = analizar_mfsu_gaia('gaia_massive_events.csv')
+if __name__ == "__main__":
+    # Si el catálogo y las constantes no han cambiado, se reutiliza el resultado
+    analisis = ResultCache().call(
+        'gaia_delta_f', etapa_gaia, 'gaia_massive_events.csv',
+        inputs=['gaia_massive_events.csv'], params={'CHI': CHI},
+        outputs=['resultados_mfsu_gaia.csv', 'resultados_mfsu_gaia.npcol'],
+    )
+    # El resumen se imprime también cuando el resultado viene de la caché
+    imprimir_resumen(len(analisis), *resumen_delta_f(analisis['delta_F_calculado']))
+    export_from_env()
@@ -1,12 +1,22 @@
 import pandas as pd
 import numpy as np
 import math
+import os
+import sys
+
+# Escritura por bloques y registros tipados compartidos (raíz del repositorio).
+# La ruta sólo se añade al ejecutar el archivo como script; al
+# importarlo como módulo, core ya debe ser importable.
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from core.synthetic import write_catalog
+from core.registers import SCHEMAS, write_register
 
 # Constantes MFSU V2
 CHI = 12.65
 DELTA_F_TARGET = 0.921
 
-def generar_csv_jwst_100():
+def generar_csv_jwst_100(verbose=False):
     data = []
     
     # Simulación de distribución basada en catálogos reales (z vs Masa)
@@ -50,11 +60,56 @@ def generar_csv_jwst_100():
     df = df.sort_values(by='REDSHIFT_Z', ascending=False)
     
     # Guardar el archivo
-    df.to_csv('REGISTRO_MAESTRO_JWST_100.csv', index=False)
-    print("✅ Archivo 'REGISTRO_MAESTRO_JWST_100.csv' creado con 100 galaxias reales.")
+    write_register(df, 'REGISTRO_MAESTRO_JWST_100.csv', SCHEMAS['jwst'])
+    if verbose:
+        print("✅ Archivo 'REGISTRO_MAESTRO_JWST_100.csv' creado con 100 galaxias reales.")
     return df
 
+def generar_catalogo_jwst(n, rng, inicio=0, total=None):
+    """
+    Versión vectorizada de generar_csv_jwst_100 para n galaxias.
+
+    Devuelve un dict {columna: array} con las filas inicio..inicio+n de un
+    catálogo de `total` filas (por defecto n), en orden de generación.
+    Los niveles de redshift siguen las mismas proporciones que el registro
+    de 100: el primer 10% JADES/GLASS (z 10-13.5), el siguiente 30% CEERS
+    (z 6-10) y el resto PEARLS (z 2-6). `rng` es un numpy.random.Generator.
+    """
+    total = n if total is None else total
+    j = np.arange(inicio, inicio + n, dtype=np.int64)
+
+    # 1. Redshift (z) por nivel de la posición en el catálogo
+    z_lo = np.where(10 * j < total, 10.0, np.where(10 * j < 4 * total, 6.0, 2.0))
+    z_hi = np.where(10 * j < total, 13.5, np.where(10 * j < 4 * total, 10.0, 6.0))
+    z = rng.uniform(z_lo, z_hi)
+
+    # 2. V_bar y 3. LEY DE FRANCO con la fluctuación observada
+    v_bar = rng.uniform(25, 110, n)
+    delta_f_real = DELTA_F_TARGET * (1 - (z / 25)) + rng.normal(0, 0.02, n)
+
+    # 4. V_obs = V_bar * CHI^(1 - delta_f)
+    v_obs_jwst = v_bar * np.power(CHI, 1 - delta_f_real)
+
+    mission = np.where(z > 10, 'JADES', np.where(z > 6, 'CEERS', 'PEARLS'))
+    return {
+        'GALAXY_ID': np.char.add(np.char.add(mission, '-'), (1001 + j).astype(str)),
+        'REDSHIFT_Z': np.round(z, 2),
+        'V_BAR_KM_S': np.round(v_bar, 2),
+        'V_OBS_JWST': np.round(v_obs_jwst, 2),
+        'DELTA_F_DNA': np.round(delta_f_real, 4),
+        'PRECISION_VS_TARGET': np.round((1 - np.abs(delta_f_real - DELTA_F_TARGET) / DELTA_F_TARGET) * 100, 2),
+        'BRANCH_STATUS': np.where(z > 9, 'Primordial', 'Young Branch'),
+    }
+
+def escribir_catalogo_jwst(path, n, seed=None, chunk_size=1_000_000, workers=1):
+    """
+    Escribe un catálogo JWST sintético de n filas en `path` (.csv o .parquet)
+    por bloques de `chunk_size`, reproducible a partir de `seed` para
+    cualquier número de `workers`. Devuelve el número de filas escritas.
+    """
+    return write_catalog(path, generar_catalogo_jwst, n, seed, chunk_size, workers)
+
 if __name__ == "__main__":
-    df_jwst = generar_csv_jwst_100()
+    df_jwst = generar_csv_jwst_100(verbose=True)
     print(df_jwst.head(10)) # Mostrar las 10 más antiguas (z alto)
 
@@ -1,26 +1,38 @@
 import pandas as pd
 import numpy as np
 import math
+import os
+import sys
+
+# Escritura por bloques y registros tipados compartidos (raíz del repositorio).
+# La ruta sólo se añade al ejecutar el archivo como script; al
+# importarlo como módulo, core ya debe ser importable.
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from core.synthetic import write_catalog
+from core.registers import SCHEMAS, write_register
 
 # Constantes MFSU V2
 CHI = 12.65
 DELTA_F_PAUSA = 0.921
 
+# Datos reales simplificados de eventos clave de LIGO/Virgo/KAGRA
+EVENTOS_LIGO = [
+    # ID_Evento, M1, M2, E_rad (energía en masas solares), Distancia(Mpc)
+    ("GW150914", 35.6, 30.6, 3.0, 440),
+    ("GW170817", 1.46, 1.27, 0.04, 40),
+    ("GW190521", 85.0, 66.0, 7.6, 3920),
+    ("GW170104", 31.2, 19.4, 2.0, 880),
+    ("GW170814", 30.5, 25.3, 2.7, 540),
+    ("GW190412", 30.1, 8.3, 1.8, 730),
+    ("GW151226", 14.2, 7.5, 1.0, 440),
+    ("GW190814", 23.2, 2.59, 1.2, 240),
+    ("GW190425", 2.0, 1.4, 0.05, 160),
+    ("GW200115", 5.9, 1.5, 0.1, 300)
+]
+
 def generar_dataset_ligo_master():
-    # Datos reales simplificados de eventos clave de LIGO/Virgo/KAGRA
-    eventos = [
-        # ID_Evento, M1, M2, E_rad (energía en masas solares), Distancia(Mpc)
-        ("GW150914", 35.6, 30.6, 3.0, 440),
-        ("GW170817", 1.46, 1.27, 0.04, 40),
-        ("GW190521", 85.0, 66.0, 7.6, 3920),
-        ("GW170104", 31.2, 19.4, 2.0, 880),
-        ("GW170814", 30.5, 25.3, 2.7, 540),
-        ("GW190412", 30.1, 8.3, 1.8, 730),
-        ("GW151226", 14.2, 7.5, 1.0, 440),
-        ("GW190814", 23.2, 2.59, 1.2, 240),
-        ("GW190425", 2.0, 1.4, 0.05, 160),
-        ("GW200115", 5.9, 1.5, 0.1, 300)
-    ]
+    eventos = EVENTOS_LIGO
     
     data = []
     
@@ -64,9 +76,63 @@ def generar_dataset_ligo_master():
         })
 
     df = pd.DataFrame(data)
-    df.to_csv('REGISTRO_MAESTRO_LIGO_100.csv', index=False)
+    write_register(df, 'REGISTRO_MAESTRO_LIGO_100.csv', SCHEMAS['ligo'])
     return df
 
-print("📡 Extrayendo jugo de la red de espín...")
-generar_dataset_ligo_master()
-print("✅ REGISTRO_MAESTRO_LIGO_100.csv listo para el paper.")
+def generar_catalogo_ligo(n, rng, inicio=0, total=None):
+    """
+    Versión vectorizada de generar_dataset_ligo_master para n eventos.
+
+    Devuelve un dict {columna: array} con las filas inicio..inicio+n del
+    catálogo: las primeras filas son los eventos reales de EVENTOS_LIGO y el
+    resto eventos simulados con el mismo modelo de fracción de energía
+    (E_rad / M_total entre 0.02 y 0.06). `rng` es un numpy.random.Generator.
+    """
+    j = np.arange(inicio, inicio + n, dtype=np.int64)
+    n_reales = len(EVENTOS_LIGO)
+
+    # Eventos simulados (se sortean para todo el bloque y se sustituyen las
+    # filas reales después, así el flujo aleatorio no depende de inicio)
+    m_total = rng.uniform(10, 150, n)
+    erad = m_total * rng.uniform(0.02, 0.06, n)
+    distancia = rng.integers(200, 5000, n)
+    ids = np.char.add('GW-SIM-', (1001 + j).astype(str))
+    tipo = np.full(n, 'Evento de Rama', dtype='<U15')
+
+    reales = np.flatnonzero(j < n_reales)
+    if len(reales):
+        tabla = [EVENTOS_LIGO[k] for k in j[reales]]
+        ids[reales] = [ev[0] for ev in tabla]
+        m_total[reales] = [ev[1] + ev[2] for ev in tabla]
+        erad[reales] = [ev[3] for ev in tabla]
+        distancia[reales] = [ev[4] for ev in tabla]
+        tipo[reales] = np.where(erad[reales] > 2, 'Ruptura Total', 'Ajuste Elástico')
+
+    # EXTRACCIÓN DEL ADN FRACTAL: Delta_F_Ligo = Pausa + (E_rad / M_total) * log(CHI)
+    delta_f = DELTA_F_PAUSA + (erad / m_total) * math.log(CHI)
+
+    erad_col = np.round(erad, 2)
+    if len(reales):
+        erad_col[reales] = erad[reales]
+    return {
+        'EVENTO_ID': ids,
+        'MASA_TOTAL_SOLAR': np.round(m_total, 2),
+        'ENERGIA_IRRADIADA_SOLAR': erad_col,
+        'DISTANCIA_MPC': distancia,
+        'DELTA_F_LIGO': np.round(delta_f, 4),
+        'EXCESO_PRESION': np.round(delta_f - DELTA_F_PAUSA, 4),
+        'TIPO_COLAPSO': tipo,
+    }
+
+def escribir_catalogo_ligo(path, n, seed=None, chunk_size=1_000_000, workers=1):
+    """
+    Escribe un catálogo LIGO sintético de n eventos en `path` (.csv o .parquet)
+    por bloques de `chunk_size`, reproducible a partir de `seed` para
+    cualquier número de `workers`. Devuelve el número de filas escritas.
+    """
+    return write_catalog(path, generar_catalogo_ligo, n, seed, chunk_size, workers)
+
+if __name__ == "__main__":
+    print("📡 Extrayendo jugo de la red de espín...")
+    generar_dataset_ligo_master()
+    print("✅ REGISTRO_MAESTRO_LIGO_100.csv listo para el paper.")
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+MFSU V2 - Benchmarks de las rutas críticas
+
+Mide cada etapa a varios tamaños de entrada (filas o píxeles), guarda
+tiempo, rendimiento y pico de memoria (tracemalloc) en un historial JSON
+y marca las regresiones frente a una línea base guardada.
+
+Uso:
+    python benchmarks/run_benchmarks.py                    # tamaños rápidos
+    python benchmarks/run_benchmarks.py --full             # 1e3..1e7 filas, 512²..8192² px
+    python benchmarks/run_benchmarks.py --only gaia,atlas_box_counting
+    python benchmarks/run_benchmarks.py --save-baseline    # fija la línea base
+    python benchmarks/run_benchmarks.py --tolerance 0.15   # umbral de regresión (+15%)
+
+Sale con código 1 si alguna medida empeora respecto a la línea base más
+de la tolerancia (tiempo o pico de memoria).
+
+El historial (benchmarks/history.json) y la línea base
+(benchmarks/baseline.json) dependen de la máquina y no se versionan (ver
+.gitignore). Sin línea base no hay comparación: en CI hay que generarla con
+--save-baseline en el commit de referencia, en la misma máquina, y ejecutar
+después con --require-baseline, que sale con código 2 si falta.
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+import contextlib
+import importlib.util
+from importlib.machinery import SourceFileLoader
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+HISTORY_PATH = os.path.join(ROOT, 'benchmarks', 'history.json')
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+ROW_SIZES = [10**3, 10**4, 10**5, 10**6, 10**7]
+PIXEL_SIZES = [512, 1024, 2048, 4096, 8192]
+QUICK_ROW_SIZES = [10**3, 10**4, 10**5]
+QUICK_PIXEL_SIZES = [512, 1024]
+
+# nombre -> (tipo de tamaño, unidad, tamaño máximo razonable, función de preparación)
+BENCHMARKS = {}
+
+def benchmark(name, kind='rows', unit='rows', max_size=None):
+    """Registra una función `setup(size, workdir) -> run` como benchmark."""
+    def register(setup):
+        BENCHMARKS[name] = (kind, unit, max_size, setup)
+        return setup
+    return register
+
+_scripts = {}
+
+def load_script(relative_path):
+    """Importa uno de los scripts del repositorio (GAIA/, FERMI/, ATLAS31/...) por ruta."""
+    if relative_path not in _scripts:
+        path = os.path.join(ROOT, relative_path)
+        name = 'bench_' + os.path.splitext(os.path.basename(path))[0].lower()
+        loader = SourceFileLoader(name, path)
+        module = importlib.util.module_from_spec(importlib.util.spec_from_loader(name, loader))
+        sys.modules[name] = module
+        with contextlib.redirect_stdout(io.StringIO()):
+            loader.exec_module(module)
+        _scripts[relative_path] = module
+    return _scripts[relative_path]
+
+def velocities(size, seed=0):
+    rng = np.random.default_rng(seed)
+    v_bar = rng.uniform(20, 300, size)
+    v_obs = v_bar * rng.uniform(1.0, 1.6, size)
+    return v_obs, v_bar
+
+# --- Motor ---
+
+@benchmark('engine_scalar', max_size=10**6)
+def setup_engine_scalar(size, workdir):
+    from core.engine import predict_velocity, extract_dna, calculate_precision
+    v_obs, v_bar = (a.tolist() for a in velocities(size))
+
+    def run():
+        for vo, vb in zip(v_obs, v_bar):
+            calculate_precision(vo, predict_velocity(vb))
+            extract_dna(vo, vb)
+    return run
+
+@benchmark('engine_batch')
+def setup_engine_batch(size, workdir):
+    from core.engine import predict_velocity_batch, extract_dna_batch, calculate_precision_batch
+    v_obs, v_bar = velocities(size)
+
+    def run():
+        calculate_precision_batch(v_obs, predict_velocity_batch(v_bar))
+        extract_dna_batch(v_obs, v_bar)
+    return run
+
+@benchmark('scan_grid', max_size=10**6)
+def setup_scan_grid(size, workdir):
+    # Rejilla de 10 x 10 puntos (CHI, delta_F) sobre un catálogo de velocidades
+    from core.scan import scan_grid, velocity_catalog
+    catalogs = {'gaia': velocity_catalog(*velocities(size))}
+    return lambda: scan_grid(catalogs, np.linspace(8, 16, 10), np.linspace(0.3, 1.1, 10))
+
+@benchmark('service_predict', max_size=10**5)
+def setup_service_predict(size, workdir):
+    # `size` peticiones escalares concurrentes agrupadas en micro-lotes
+    import asyncio
+    from core.service import PredictionService
+    _, v_bar = (a.tolist() for a in velocities(size))
+
+    async def requests():
+        async with PredictionService() as service:
+            await asyncio.gather(*(service.call('predict_velocity', vb) for vb in v_bar))
+    return lambda: asyncio.run(requests())
+
+@benchmark('ingest_events', max_size=10**6)
+def setup_ingest_events(size, workdir):
+    # Alertas LIGO de una en una con ventanas deslizantes de 100 / 1000 / 10000
+    from core.ingest import EventIngestor
+    rng = np.random.default_rng(size)
+    m_total = rng.uniform(10, 150, size)
+    e_rad = m_total * rng.uniform(0.02, 0.06, size)
+    events = [{'m_total': m, 'e_rad': e} for m, e in zip(m_total.tolist(), e_rad.tolist())]
+
+    def run():
+        ingestor = EventIngestor()
+        for event in events:
+            ingestor.process(event)
+    return run
+
+# --- SPARC ---
+
+@benchmark('sparc_directory', kind='files', unit='files', max_size=10**4)
+def setup_sparc_directory(size, workdir):
+    from core.processor import process_sparc_directory
+    directory = os.path.join(workdir, f'sparc_{size}')
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(size)
+    for g in range(size):
+        rows = np.column_stack([
+            np.arange(1, 31) * 0.5,            # radio
+            rng.uniform(80, 250, 30),          # v_obs
+            rng.uniform(2, 10, 30),            # err_v
+            rng.uniform(10, 60, 30),           # v_gas
+            rng.uniform(40, 150, 30),          # v_disk
+            rng.uniform(0, 50, 30),            # v_bul
+        ])
+        with open(os.path.join(directory, f'G{g:06d}_rotmod.dat'), 'w') as f:
+            f.write('# Distance = 10 Mpc\n# Rad Vobs errV Vgas Vdisk Vbul\n# kpc km/s km/s km/s km/s km/s\n')
+            np.savetxt(f, rows, fmt='%.3f')
+
+    return lambda: process_sparc_directory(directory)
+
+# --- GAIA / Fermi ---
+
+def gaia_frame(size, seed=0):
+    v_obs, v_bar = velocities(size, seed)
+    return pd.DataFrame({
+        'event_id': np.arange(1, size + 1),
+        'radius_kpc': np.linspace(5, 25, size),
+        'v_obs_kms': v_obs,
+        'v_bar_kms': v_bar,
+    })
+
+@benchmark('gaia')
+def setup_gaia(size, workdir):
+    gaia = load_script('GAIA/scr/GAIA_MFSU_VALIDATION.py')
+    path = os.path.join(workdir, f'gaia_{size}.csv')
+    gaia_frame(size).to_csv(path, index=False)
+
+    def run():
+        # analizar_mfsu_gaia escribe su salida en el directorio actual
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                gaia.analizar_mfsu_gaia(path)
+        finally:
+            os.chdir(cwd)
+    return run
+
+@benchmark('fermi_gaia_merge')
+def setup_fermi_gaia_merge(size, workdir):
+    merge = load_script('FERMI/src/Master_Merge_MFSU.py')
+    df_gaia = gaia_frame(size)
+    df_gaia['delta_F_calculado'] = 1 - np.log(df_gaia['v_obs_kms'] / df_gaia['v_bar_kms']) / np.log(12.65)
+    rng = np.random.default_rng(1)
+    df_fermi = pd.DataFrame({
+        'grb_id': np.arange(size).astype(str),
+        'e_peak_kev': rng.uniform(50, 2000, size),
+        'distancia_recorrida_kpc': rng.uniform(5, 25, size),
+    })
+    return lambda: merge.cruzar_fermi_gaia(df_fermi.copy(), df_gaia)
+
+# --- Generadores sintéticos ---
+
+@benchmark('jwst_generator')
+def setup_jwst_generator(size, workdir):
+    jwst = load_script('JWST/scr/JWST_MFSU_VALIDATION.py')
+    return lambda: jwst.generar_catalogo_jwst(size, np.random.default_rng(0))
+
+@benchmark('ligo_generator')
+def setup_ligo_generator(size, workdir):
+    ligo = load_script('LIGO/scr/ligo_mfsuv2.py')
+    return lambda: ligo.generar_catalogo_ligo(size, np.random.default_rng(0))
+
+# --- Almacén de registros ---
+
+@benchmark('store_query', max_size=10**6)
+def setup_store_query(size, workdir):
+    # 100 consultas rango + filtro sobre un catálogo JWST cargado una sola vez
+    from core.store import RegisterStore
+    jwst = load_script('JWST/scr/JWST_MFSU_VALIDATION.py')
+    path = os.path.join(workdir, 'jwst_store.csv')
+    jwst.escribir_catalogo_jwst(path, size, seed=0)
+    store = RegisterStore().load('jwst', path)
+
+    def run():
+        for lo in np.linspace(2.0, 13.0, 100):
+            store.query('jwst', {'REDSHIFT_Z': (lo, lo + 0.05), 'DELTA_F_DNA': (0.4, 0.6)})
+    return run
+
+# --- ATLAS ---
+
+def atlas_frame(size):
+    atlas = load_script('ATLAS31/COLABVERSION_ATLAS.PY')
+    analyzer = atlas.MFSURealCometAnalysis(verbose=False)
+    image = analyzer.create_demo_atlas_image(size=size)
+    return analyzer, image
+
+@benchmark('atlas_preprocessing', kind='pixels', unit='pixels')
+def setup_atlas_preprocessing(size, workdir):
+    analyzer, image = atlas_frame(size)
+    return lambda: analyzer.rigorous_preprocessing(image)
+
+@benchmark('atlas_box_counting', kind='pixels', unit='pixels')
+def setup_atlas_box_counting(size, workdir):
+    analyzer, image = atlas_frame(size)
+    processed, data = analyzer.rigorous_preprocessing(image)
+    return lambda: analyzer.rigorous_box_counting(processed, data)
+
+@benchmark('atlas_threshold_sweep', kind='pixels', unit='pixels')
+def setup_atlas_threshold_sweep(size, workdir):
+    # Curva df(umbral) con 100 umbrales entre 0.5 y 2 veces el de detección
+    analyzer, image = atlas_frame(size)
+    processed, data = analyzer.rigorous_preprocessing(image)
+    thresholds = data['detection_threshold'] * np.linspace(0.5, 2.0, 100)
+    return lambda: analyzer.threshold_sweep(processed, data['star_mask'], thresholds)
+
+@benchmark('atlas_radial_profile', kind='pixels', unit='pixels')
+def setup_atlas_radial_profile(size, workdir):
+    analyzer, image = atlas_frame(size)
+    processed, data = analyzer.rigorous_preprocessing(image)
+    return lambda: analyzer.rigorous_radial_analysis(processed, data)
+
+# --- Ejecución ---
+
+def measure(run, repeat=3, min_time=1.0):
+    """
+    Mejor tiempo de hasta `repeat` ejecuciones (sólo se repite si una
+    ejecución tarda menos de `min_time` s) y pico de memoria de otra
+    ejecución aparte con tracemalloc (que ralentiza y no se cronometra).
+    """
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - t0)
+        if times[-1] >= min_time:
+            break
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+def run_suite(names, full=False, max_rows=None, max_pixels=None, repeat=3):
+    row_sizes = ROW_SIZES if full else QUICK_ROW_SIZES
+    pixel_sizes = PIXEL_SIZES if full else QUICK_PIXEL_SIZES
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix='mfsu_bench_') as workdir:
+        for name in names:
+            kind, unit, max_size, setup = BENCHMARKS[name]
+            sizes = pixel_sizes if kind == 'pixels' else row_sizes
+            limit = max_pixels if kind == 'pixels' else max_rows
+            for size in sizes:
+                if (max_size and size > max_size) or (limit and size > limit):
+                    continue
+                items = size * size if kind == 'pixels' else size
+                record = {'name': name, 'size': size, 'unit': unit, 'items': items}
+                try:
+                    seconds, peak = measure(setup(size, workdir), repeat)
+                    record.update({
+                        'seconds': seconds,
+                        'throughput': items / seconds if seconds > 0 else None,
+                        'peak_mb': peak / 1024**2,
+                    })
+                except MemoryError as e:
+                    record['error'] = f"MemoryError: {e}"
+                results.append(record)
+                print(format_record(record), flush=True)
+    return results
+
+def format_record(record):
+    label = f"{record['name']:<22} {record['size']:>10,}"
+    if 'error' in record:
+        return f"{label}  ERROR {record['error']}"
+    return (f"{label}  {record['seconds']*1000:10.2f} ms  "
+            f"{record['throughput']:14,.0f} {record['unit']}/s  {record['peak_mb']:9.1f} MB")
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1)
+
+def compare(results, baseline, tolerance):
+    """Medidas que empeoran más de `tolerance` (relativo) en tiempo o memoria."""
+    reference = {(r['name'], r['size']): r for r in baseline.get('results', []) if 'error' not in r}
+    regressions = []
+    for r in results:
+        ref = reference.get((r['name'], r['size']))
+        if ref is None or 'error' in r:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            if ref[metric] > 0 and r[metric] > ref[metric] * (1 + tolerance):
+                regressions.append({
+                    'name': r['name'], 'size': r['size'], 'metric': metric,
+                    'baseline': ref[metric], 'current': r[metric],
+                    'ratio': r[metric] / ref[metric],
+                })
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de las rutas críticas de MFSU V2")
+    parser.add_argument('--only', help="lista de benchmarks separados por comas")
+    parser.add_argument('--full', action='store_true', help="todos los tamaños (hasta 1e7 filas y 8192² px)")
+    parser.add_argument('--max-rows', type=int, help="tamaño máximo en filas")
+    parser.add_argument('--max-pixels', type=int, help="lado máximo de imagen en píxeles")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--tolerance', type=float, default=0.25, help="regresión si empeora más de esta fracción")
+    parser.add_argument('--save-baseline', action='store_true', help="guarda esta ejecución como línea base")
+    parser.add_argument('--require-baseline', action='store_true',
+                        help="falla (código 2) si no hay línea base con la que comparar")
+    parser.add_argument('--history', default=HISTORY_PATH)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--list', action='store_true', help="muestra los benchmarks disponibles")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (kind, unit, max_size, _) in BENCHMARKS.items():
+            print(f"{name:<22} {kind:<7} max={max_size or '-'}")
+        return 0
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"benchmarks desconocidos: {', '.join(unknown)}")
+
+    run = {**environment(), 'full': args.full, 'results': run_suite(
+        names, args.full, args.max_rows, args.max_pixels, args.repeat)}
+
+    history = load_json(args.history, [])
+    history.append(run)
+    save_json(args.history, history)
+
+    if args.save_baseline:
+        save_json(args.baseline, run)
+        print(f"\nLínea base guardada en {args.baseline}")
+        return 0
+
+    baseline = load_json(args.baseline, None)
+    if baseline is None:
+        print("\nSin línea base (usa --save-baseline para crearla)")
+        return 2 if args.require_baseline else 0
+
+    regressions = compare(run['results'], baseline, args.tolerance)
+    run['regressions'] = regressions
+    save_json(args.history, history)
+    if not regressions:
+        print(f"\nSin regresiones frente a {baseline.get('commit') or 'la línea base'} (tolerancia {args.tolerance:.0%})")
+        return 0
+    print(f"\n⚠️  {len(regressions)} regresiones frente a {baseline.get('commit') or 'la línea base'}:")
+    for reg in regressions:
+        print(f"   {reg['name']:<22} {reg['size']:>10,}  {reg['metric']:<8} "
+              f"{reg['baseline']:.4g} -> {reg['current']:.4g} (x{reg['ratio']:.2f})")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,56 @@
-from .constants import CHI, DELTA_F, RU, FRACTAL_SCALE_V2
-from .engine import apply_mfsu_transform
+"""
+MFSU V2 - Paquete core
+
+Sólo las constantes se cargan al importar `core`. Las funciones del motor y
+los submódulos (processor, fitting, registers...) se importan la primera vez
+que se usan, así que `import core` no arrastra pandas, scipy ni matplotlib.
+"""
+
+import importlib
+from .constants import CHI, DELTA_F, DELTA_F_ORIGINAL, RU, FRACTAL_SCALE_V2, UMBRAL_PRECISION
 
 __version__ = "2.2.0-Diamond"
-__all__ = ['CHI', 'DELTA_F', 'RU', 'apply_mfsu_transform']
+
+# Nombre público -> submódulo que lo define
+_LAZY_ATTRS = {
+    'apply_mfsu_transform': 'engine',
+    'delta_f_level': 'engine',
+    'predict_velocity': 'engine',
+    'extract_dna': 'engine',
+    'calculate_precision': 'engine',
+    'predict_velocity_batch': 'engine',
+    'extract_dna_batch': 'engine',
+    'calculate_precision_batch': 'engine',
+    'MFSUQuaternion': 'quaternion_engine',
+    'QuaternionArray': 'quaternion_engine',
+    'MODELS': 'models',
+    'get_model': 'models',
+    'classify_branch': 'models',
+}
+
+_SUBMODULES = {
+    'cache', 'constants', 'engine', 'evolution_plotter', 'fitting', 'ingest', 'metrics', 'models',
+    'processor', 'quaternion_engine', 'radius_index', 'registers', 'scan', 'service', 'sparc_io',
+    'store', 'synthetic', 'uncertainty',
+}
+
+__all__ = [
+    'CHI', 'DELTA_F', 'DELTA_F_ORIGINAL', 'RU', 'FRACTAL_SCALE_V2', 'UMBRAL_PRECISION',
+    'apply_mfsu_transform', 'delta_f_level',
+    'predict_velocity', 'extract_dna', 'calculate_precision',
+    'predict_velocity_batch', 'extract_dna_batch', 'calculate_precision_batch',
+    'MFSUQuaternion', 'QuaternionArray',
+    'MODELS', 'get_model', 'classify_branch',
+]
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(f'.{_LAZY_ATTRS[name]}', __name__), name)
+        globals()[name] = value
+        return value
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS) | _SUBMODULES)
@@ -0,0 +1,184 @@
+"""
+MFSU V2 - Caché de resultados
+Caché en disco direccionada por contenido para las etapas de validación.
+
+La clave de cada resultado es un sha256 sobre: nombre de la etapa, versión
+de la función, constantes del modelo (CHI, DELTA_F_ORIGINAL,
+UMBRAL_PRECISION), hash del contenido de los archivos de entrada y
+parámetros extra. Si nada de eso cambia, la etapa no se vuelve a ejecutar.
+Los resultados se guardan con pickle y se descartan por LRU cuando la
+caché supera `max_bytes`.
+"""
+
+import os
+import json
+import pickle
+import hashlib
+import tempfile
+from . import constants
+
+CACHE_FORMAT = 1
+DEFAULT_CACHE_DIR = os.environ.get('MFSU_CACHE_DIR', os.path.join('.', '.mfsu_cache'))
+DEFAULT_MAX_BYTES = 2 * 1024**3
+MODEL_CONSTANTS = ('CHI', 'DELTA_F_ORIGINAL', 'UMBRAL_PRECISION')
+
+# Hashes ya calculados en este proceso: (ruta, tamaño, mtime) -> sha256
+_digests = {}
+
+def file_digest(path, block_size=1 << 20):
+    """
+    sha256 del contenido de un archivo. Para un directorio (p. ej. un
+    registro `.npcol`) combina los hashes de todos sus archivos en orden.
+    """
+    if os.path.isdir(path):
+        h = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                h.update(os.path.relpath(full, path).encode('utf-8'))
+                h.update(file_digest(full, block_size).encode('ascii'))
+        return h.hexdigest()
+
+    st = os.stat(path)
+    stamp = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    digest = _digests.get(stamp)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                h.update(block)
+        digest = _digests[stamp] = h.hexdigest()
+    return digest
+
+def model_constants():
+    """Valores actuales de las constantes que entran en la clave."""
+    return {name: getattr(constants, name) for name in MODEL_CONSTANTS}
+
+def cache_key(stage, inputs=(), params=None, version=1):
+    """
+    Clave de un resultado. `inputs` son rutas de archivo (se usa su
+    contenido, no su nombre) y `params` cualquier valor serializable en JSON.
+    """
+    payload = {
+        'format': CACHE_FORMAT,
+        'stage': stage,
+        'version': version,
+        'constants': model_constants(),
+        'inputs': [file_digest(p) for p in inputs],
+        'params': params,
+    }
+    blob = json.dumps(payload, sort_keys=True, default=repr).encode('utf-8')
+    return hashlib.sha256(blob).hexdigest()
+
+class ResultCache:
+    """
+    Almacén de resultados en `directory`, un archivo por clave.
+
+    El orden LRU se lleva con el mtime de cada archivo (se actualiza en cada
+    acierto). La instancia sólo guarda la ruta y el límite, así que puede
+    pasarse a los procesos de un pool; en ese caso conviene escribir con
+    `put(..., evict=False)` y llamar a `evict()` desde el proceso principal.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.pkl')
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def put(self, key, value, evict=True):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Escritura atómica: otro proceso nunca ve un archivo a medias
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        if evict:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.pkl'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, path))
+        return entries
+
+    def size(self):
+        """Bytes ocupados por los resultados guardados."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Borra los resultados menos usados hasta quedar bajo `max_bytes`."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            if total <= self.max_bytes:
+                break
+        return removed
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def call(self, stage, func, *args, inputs=(), params=None, version=1, outputs=(), **kwargs):
+        """
+        Ejecuta `func(*args, **kwargs)` sólo si no hay un resultado guardado
+        para (etapa, versión, constantes, entradas, parámetros). Si alguno de
+        los archivos `outputs` que escribe la etapa ya no existe, se vuelve a
+        ejecutar aunque la clave esté en caché.
+        """
+        key = cache_key(stage, inputs, params, version)
+        if all(os.path.exists(p) for p in outputs):
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        value = func(*args, **kwargs)
+        self.put(key, value)
+        return value
+
+_MISSING = object()
@@ -11,3 +11,12 @@ DELTA_F_ORIGINAL = 0.921
 
 # Umbral de precisión para considerar una galaxia como 'Original'
 UMBRAL_PRECISION = 95.0
+
+# Saturación por defecto del motor cuaterniónico (alias del Tronco Original)
+DELTA_F = DELTA_F_ORIGINAL
+
+# Constante de Cohesión Universal R_u = 1 - 0.921 (tasa de reducción por nivel)
+RU = 0.079
+
+# Escala fractal V2: con 1.0 el boost estructural es exactamente CHI / (CHI - 1) = 1.0858
+FRACTAL_SCALE_V2 = 1.0
@@ -1,5 +1,7 @@
 import math
-from .constants import CHI, DELTA_F_ORIGINAL
+from .constants import CHI, DELTA_F, DELTA_F_ORIGINAL, RU
+
+LOG_CHI = math.log(CHI)
 
 def predict_velocity(v_bar, delta_f=DELTA_F_ORIGINAL):
     """
@@ -21,3 +23,102 @@ def calculate_precision(v_obs, v_pred):
     """Calcula la exactitud del modelo respecto a la observación."""
     if v_obs <= 0: return 0
     return (1 - abs(v_obs - v_pred) / v_obs) * 100
+
+# --- API VECTORIZADA (catálogos completos en una sola pasada) ---
+# NumPy se importa dentro de cada función: las llamadas escalares (y el
+# propio `import core.engine`) no lo cargan.
+
+def _is_scalar(value):
+    """Las llamadas escalares usan la ruta `math` para ser idénticas bit a bit."""
+    if isinstance(value, (int, float)):
+        return True
+    import numpy as np
+    return np.ndim(value) == 0 and not np.ma.isMaskedArray(value)
+
+def _as_float_array(values):
+    """
+    Convierte escalares, listas, arrays enmascarados o Series de pandas
+    en un ndarray float64 y devuelve también su máscara de entradas inválidas.
+    """
+    import numpy as np
+    mask = np.ma.getmaskarray(values) if np.ma.isMaskedArray(values) else None
+    arr = np.asarray(np.ma.getdata(values) if mask is not None else values, dtype=np.float64)
+    if mask is None:
+        mask = np.zeros(arr.shape, dtype=bool)
+    return arr, mask
+
+def _wrap_like(result, mask, *templates):
+    """
+    Devuelve el resultado con el mismo 'envoltorio' que la entrada:
+    Series con su índice, MaskedArray con su máscara o ndarray simple.
+    """
+    import numpy as np
+    for tpl in templates:
+        if hasattr(tpl, 'index') and hasattr(tpl, 'to_numpy'):
+            return type(tpl)(result, index=tpl.index)
+    if any(np.ma.isMaskedArray(tpl) for tpl in templates):
+        return np.ma.MaskedArray(result, mask=mask)
+    return result
+
+def predict_velocity_batch(v_bar, delta_f=DELTA_F_ORIGINAL):
+    """
+    Versión vectorizada de predict_velocity.
+    `delta_f` puede ser un escalar o un array que se difunde elemento a elemento.
+    """
+    if _is_scalar(v_bar) and _is_scalar(delta_f):
+        return predict_velocity(v_bar, delta_f)
+    import numpy as np
+    vb, m_vb = _as_float_array(v_bar)
+    df, m_df = _as_float_array(delta_f)
+    factor = np.power(CHI, 1 - df)
+    return _wrap_like(vb * factor, m_vb | m_df, v_bar, delta_f)
+
+def extract_dna_batch(v_obs, v_bar):
+    """
+    Versión vectorizada de extract_dna.
+    Igual que la escalar, devuelve 0 donde V_bar <= 0; los cocientes no
+    positivos (V_obs <= 0) devuelven NaN en lugar de lanzar un error.
+    """
+    if _is_scalar(v_obs) and _is_scalar(v_bar):
+        return extract_dna(v_obs, v_bar)
+    import numpy as np
+    vo, m_vo = _as_float_array(v_obs)
+    vb, m_vb = _as_float_array(v_bar)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.divide(vo, vb, out=np.full(np.broadcast(vo, vb).shape, np.nan), where=vb > 0)
+        dna = np.where(ratio > 0, 1 - np.log(ratio) / LOG_CHI, np.nan)
+    dna = np.where(vb <= 0, 0.0, dna)
+    return _wrap_like(dna, m_vo | m_vb, v_obs, v_bar)
+
+def calculate_precision_batch(v_obs, v_pred):
+    """Versión vectorizada de calculate_precision (0 donde V_obs <= 0)."""
+    if _is_scalar(v_obs) and _is_scalar(v_pred):
+        return calculate_precision(v_obs, v_pred)
+    import numpy as np
+    vo, m_vo = _as_float_array(v_obs)
+    vp, m_vp = _as_float_array(v_pred)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prec = (1 - np.abs(vo - vp) / vo) * 100
+    prec = np.where(vo <= 0, 0.0, prec)
+    return _wrap_like(prec, m_vo | m_vp, v_obs, v_pred)
+
+# --- TRANSFORMACIÓN MFSU COMPLETA ---
+
+def delta_f_level(n):
+    """
+    Ley de Reducción Universal: delta_F(n) = 0.921 * exp(-R_u * n)
+    para el nivel de ramificación n (escalar o array).
+    """
+    if _is_scalar(n):
+        return DELTA_F * math.exp(-RU * n)
+    import numpy as np
+    return DELTA_F * np.exp(-RU * np.asarray(n, dtype=np.float64))
+
+def apply_mfsu_transform(v_bar, n=0):
+    """
+    Punto de entrada del modelo: velocidad MFSU de V_bar en el nivel n,
+    V_mfsu = V_bar * CHI^(1 - delta_F(n)). En la Rama Original (n=0)
+    coincide exactamente con predict_velocity. Acepta escalares, arrays,
+    arrays enmascarados o Series (y `n` por elemento).
+    """
+    return predict_velocity_batch(v_bar, delta_f_level(n))
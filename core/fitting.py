@@ -0,0 +1,160 @@
+"""
+MFSU V2 - Ajuste de curva completa
+Ajusta delta_F contra todos los radios de todas las curvas de rotación
+en una única pasada vectorizada.
+
+Las curvas se guardan como un array 'ragged': un buffer plano por columna
+y un vector `offsets` (n_galaxias + 1) tal que la galaxia g ocupa
+flat[offsets[g]:offsets[g + 1]].
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from .constants import CHI
+from .sparc_io import SPARC_COLUMNS, read_rotmod, baryonic_velocity
+from .processor import iter_sparc_files
+from .metrics import span
+
+LOG_CHI = np.log(CHI)
+
+NO_CURVES = "No se encontraron curvas SPARC válidas"
+
+def concatenate_curves(curves):
+    """
+    Une una lista de curvas (dicts de arrays con las mismas claves)
+    en (offsets, columnas planas).
+    """
+    lengths = np.array([len(next(iter(c.values()))) for c in curves], dtype=np.int64)
+    offsets = np.zeros(len(curves) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    keys = curves[0].keys() if curves else ()
+    flat = {k: np.concatenate([c[k] for c in curves]) for k in keys}
+    return offsets, flat
+
+def segment_ids(offsets):
+    """Índice de galaxia de cada punto del buffer plano."""
+    lengths = np.diff(offsets)
+    return np.repeat(np.arange(len(lengths)), lengths)
+
+@span('sparc.fit', items=lambda offsets, *a, **k: len(offsets) - 1)
+def fit_delta_f(offsets, v_obs, v_bar, err_v=None):
+    """
+    Ajuste por mínimos cuadrados ponderados de delta_F por galaxia.
+
+    La Ley de Franco V_obs = V_bar * CHI^(1 - delta_F) es lineal en log:
+        y_i = ln(V_obs / V_bar) / ln(CHI) = 1 - delta_F
+    así que el óptimo de cada galaxia es una media ponderada de y_i, con
+    pesos 1/sigma_y² y sigma_y = errV / (V_obs * ln CHI). Todas las galaxias
+    se resuelven a la vez con sumas por segmento (np.bincount).
+
+    Es una aproximación en espacio logarítmico (errores propagados a primer
+    orden): no coincide exactamente con un ajuste no lineal en velocidad
+    (scipy.optimize.curve_fit), que puede diferir en una fracción de sigma.
+
+    Los puntos con V_obs, V_bar o errV no positivos o NaN no participan.
+    Sin `err_v` se usan pesos unitarios y la incertidumbre se escala con la
+    dispersión de los residuos.
+
+    Devuelve un dict de arrays (uno por galaxia): 'delta_f', 'delta_f_err',
+    'chi2', 'chi2_red' y 'n_points'. Las galaxias sin puntos válidos quedan en NaN.
+    """
+    v_obs = np.asarray(v_obs, dtype=np.float64)
+    v_bar = np.asarray(v_bar, dtype=np.float64)
+    ids = segment_ids(offsets)
+    n_gal = len(offsets) - 1
+
+    valid = (v_obs > 0) & (v_bar > 0)
+    if err_v is not None:
+        err_v = np.asarray(err_v, dtype=np.float64)
+        valid &= err_v > 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = np.log(v_obs / v_bar) / LOG_CHI
+        if err_v is not None:
+            sigma_y = err_v / (v_obs * LOG_CHI)
+            w = 1.0 / sigma_y**2
+        else:
+            w = np.ones_like(y)
+    w = np.where(valid, w, 0.0)
+    y = np.where(valid, y, 0.0)
+
+    n_points = np.bincount(ids, weights=valid, minlength=n_gal).astype(np.int64)
+    sum_w = np.bincount(ids, weights=w, minlength=n_gal)
+    sum_wy = np.bincount(ids, weights=w * y, minlength=n_gal)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y_fit = sum_wy / sum_w
+        resid = y - y_fit[ids]
+        chi2 = np.bincount(ids, weights=w * resid**2, minlength=n_gal)
+        dof = n_points - 1
+        chi2_red = np.where(dof > 0, chi2 / dof, np.nan)
+        if err_v is not None:
+            delta_f_err = np.sqrt(1.0 / sum_w)
+        else:
+            delta_f_err = np.sqrt(chi2_red / sum_w)
+
+    empty = n_points == 0
+    return {
+        'delta_f': np.where(empty, np.nan, 1 - y_fit),
+        'delta_f_err': np.where(empty, np.nan, delta_f_err),
+        'chi2': np.where(empty, np.nan, chi2),
+        'chi2_red': chi2_red,
+        'n_points': n_points,
+    }
+
+def load_sparc_curves(paths, return_failures=False):
+    """
+    Lee las curvas completas de SPARC. Devuelve (nombres, offsets, columnas)
+    con V_bar ya calculada en la columna 'v_bar'. Los archivos ilegibles se
+    omiten; con `return_failures=True` se devuelven también como cuarto
+    elemento (lista de {'PATH', 'REASON'}, como process_sparc_directory).
+    Si no hay ninguna curva válida se lanza ValueError, salvo con
+    `return_failures=True`, que devuelve un resultado vacío y los fallos.
+    """
+    names, curves, failures = [], [], []
+    for path in paths:
+        try:
+            curve = read_rotmod(path)
+        except (OSError, ValueError) as e:
+            failures.append({'PATH': path, 'REASON': f"{type(e).__name__}: {e}"})
+            continue
+        curve['v_bar'] = baryonic_velocity(curve)
+        names.append(os.path.basename(path).split('.')[0])
+        curves.append(curve)
+    if not curves and not return_failures:
+        raise ValueError(NO_CURVES)
+    if not curves:
+        flat = {k: np.empty(0) for k in (*SPARC_COLUMNS, 'v_bar')}
+        return names, np.zeros(1, dtype=np.int64), flat, failures
+    offsets, flat = concatenate_curves(curves)
+    if return_failures:
+        return names, offsets, flat, failures
+    return names, offsets, flat
+
+def fit_sparc_directory(directory_path, return_failures=False):
+    """
+    Ajuste de curva completa para todo un directorio SPARC.
+    Devuelve un DataFrame con una fila por galaxia.
+    Con `return_failures=True` devuelve también los archivos descartados.
+    """
+    if not os.path.exists(directory_path):
+        raise FileNotFoundError(f"No se encontró la carpeta: {directory_path}")
+
+    names, offsets, flat, failures = load_sparc_curves(iter_sparc_files(directory_path),
+                                                       return_failures=True)
+    if not names and not return_failures:
+        raise ValueError(NO_CURVES)
+    fit = fit_delta_f(offsets, flat['v_obs'], flat['v_bar'], flat['err_v'])
+
+    register = pd.DataFrame({
+        'GALAXY': names,
+        'N_POINTS': fit['n_points'],
+        'DELTA_F_FIT': np.round(fit['delta_f'], 4),
+        'DELTA_F_ERR': np.round(fit['delta_f_err'], 4),
+        'CHI2': np.round(fit['chi2'], 2),
+        'CHI2_RED': np.round(fit['chi2_red'], 3),
+    })
+    if return_failures:
+        return register, failures
+    return register
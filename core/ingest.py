@@ -0,0 +1,477 @@
+"""
+MFSU V2 - Ingesta de alertas en directo
+Procesa alertas de fusiones (estilo LIGO) y de GRBs (estilo Fermi) a medida
+que llegan, en lugar de listas fijas o CSV estáticos:
+
+  * LIGO : delta_f_evento = 0.921 + (E_rad / M_total) * ln(CHI) y
+           tension_red = delta_f_evento - 0.921 (como analizar_evento_ligo).
+  * Fermi: delta_F_red del mapa de Gaia a la distancia recorrida y
+           E_fuente_estimada = E_pico / CHI^(1 - delta_F_red) (como
+           cruzar_fermi_gaia). El mapa admite filas nuevas sin reconstruirse.
+
+Cada valor se añade a ventanas deslizantes de tamaño fijo (RollingWindow):
+buffers circulares de NumPy reservados al crear la ventana, con suma y suma
+de cuadrados acumuladas y colas monótonas para el mínimo y el máximo, así
+que añadir un valor y consultar n / media / desviación / mín / máx es O(1)
+y no reserva memoria por evento.
+
+Fuentes: cualquier iterable asíncrono de dicts (`consume`), un archivo de
+líneas JSON que crece (`tail_jsonl`), un registro reproducido fila a fila
+(`replay_register`) o un socket TCP / Unix con una alerta JSON por línea
+(`serve`).
+
+    ingestor = EventIngestor(windows=(100, 1000), gaia=GaiaMap.from_register('resultados_mfsu_gaia.csv'))
+    ingestor.process({'event_id': 'GW150914', 'm1': 35.6, 'm2': 30.6, 'e_rad': 3.0})
+    ingestor.stats()['ligo'][100]['mean']
+"""
+
+import json
+import time
+import asyncio
+from bisect import bisect_left
+import numpy as np
+from .constants import CHI, DELTA_F_ORIGINAL
+from .engine import LOG_CHI
+from .metrics import REGISTRY
+
+# Tamaños por defecto de las ventanas deslizantes (en eventos)
+WINDOW_SIZES = (100, 1000, 10000)
+
+# Nombres aceptados para cada campo de una alerta (el primero presente gana)
+FIELD_ALIASES = {
+    'event_id': ('event_id', 'EVENTO_ID', 'grb_id', 'id'),
+    'm1': ('m1', 'M1'),
+    'm2': ('m2', 'M2'),
+    'm_total': ('m_total', 'MASA_TOTAL_SOLAR', 'masa_total'),
+    'e_rad': ('e_rad', 'ENERGIA_IRRADIADA_SOLAR', 'energia_irradiada'),
+    'e_peak_kev': ('e_peak_kev', 'E_PEAK_KEV'),
+    'distance_kpc': ('distancia_recorrida_kpc', 'distance_kpc'),
+}
+
+def _field(event, name, default=None):
+    for key in FIELD_ALIASES[name]:
+        if key in event:
+            return event[key]
+    return default
+
+class RollingWindow:
+    """
+    Estadísticas de los últimos `size` valores. El buffer circular y las dos
+    colas monótonas (secuencias de los candidatos a mínimo y a máximo) son
+    arrays de NumPy de tamaño fijo. La suma se recalcula desde el buffer
+    cada `size` valores para que no acumule error de redondeo.
+    La desviación es la poblacional (ddof=0, como np.std).
+    """
+
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError("El tamaño de la ventana debe ser >= 1")
+        self.size = size
+        self._values = np.zeros(size)
+        self._min_seq = np.zeros(size, dtype=np.int64)
+        self._max_seq = np.zeros(size, dtype=np.int64)
+        self._min_value = np.zeros(size)
+        self._max_value = np.zeros(size)
+        # Vistas de los mismos buffers: indexarlas da floats de Python, sin
+        # crear escalares de NumPy en cada push
+        self._v = memoryview(self._values)
+        self._min_s, self._max_s = memoryview(self._min_seq), memoryview(self._max_seq)
+        self._min_v, self._max_v = memoryview(self._min_value), memoryview(self._max_value)
+        self._min_head = self._min_tail = 0
+        self._max_head = self._max_tail = 0
+        self._seq = 0  # valores añadidos desde el inicio
+        self._sum = 0.0
+        self._sum2 = 0.0
+
+    def __len__(self):
+        return min(self._seq, self.size)
+
+    def push(self, value):
+        size, values = self.size, self._v
+        seq = self._seq
+        slot = seq % size
+        if seq >= size:
+            # Sale el valor más antiguo (secuencia seq - size)
+            old = values[slot]
+            self._sum -= old
+            self._sum2 -= old * old
+            expired = seq - size
+            if self._min_s[self._min_head % size] == expired:
+                self._min_head += 1
+            if self._max_s[self._max_head % size] == expired:
+                self._max_head += 1
+        value = float(value)
+        values[slot] = value
+        self._sum += value
+        self._sum2 += value * value
+
+        # Colas monótonas (mínimos crecientes, máximos decrecientes) con su
+        # secuencia y su valor, para no indexar dos veces
+        head, tail = self._min_head, self._min_tail
+        queue_value = self._min_v
+        while tail > head and queue_value[(tail - 1) % size] >= value:
+            tail -= 1
+        i = tail % size
+        self._min_s[i] = seq
+        queue_value[i] = value
+        self._min_tail = tail + 1
+
+        head, tail = self._max_head, self._max_tail
+        queue_value = self._max_v
+        while tail > head and queue_value[(tail - 1) % size] <= value:
+            tail -= 1
+        i = tail % size
+        self._max_s[i] = seq
+        queue_value[i] = value
+        self._max_tail = tail + 1
+
+        self._seq = seq + 1
+        if self._seq % size == 0:
+            self._sum = float(self._values.sum())
+            self._sum2 = float(np.dot(self._values, self._values))
+
+    @property
+    def count(self):
+        return len(self)
+
+    @property
+    def mean(self):
+        n = len(self)
+        return self._sum / n if n else float('nan')
+
+    @property
+    def std(self):
+        n = len(self)
+        if not n:
+            return float('nan')
+        mean = self._sum / n
+        return max(self._sum2 / n - mean * mean, 0.0) ** 0.5
+
+    @property
+    def min(self):
+        if not self._seq:
+            return float('nan')
+        return float(self._min_value[self._min_head % self.size])
+
+    @property
+    def max(self):
+        if not self._seq:
+            return float('nan')
+        return float(self._max_value[self._max_head % self.size])
+
+    @property
+    def last(self):
+        return float(self._values[(self._seq - 1) % self.size]) if self._seq else float('nan')
+
+    def values(self):
+        """Copia de los valores de la ventana en orden de llegada (O(size))."""
+        if self._seq <= self.size:
+            return self._values[:self._seq].copy()
+        return np.roll(self._values, -(self._seq % self.size))
+
+    def summary(self):
+        return {'count': self.count, 'mean': self.mean, 'std': self.std,
+                'min': self.min, 'max': self.max, 'last': self.last}
+
+class RollingStats:
+    """Una RollingWindow por tamaño para la misma serie de valores."""
+
+    def __init__(self, sizes=WINDOW_SIZES):
+        self.windows = {size: RollingWindow(size) for size in sizes}
+        self._windows = tuple(self.windows.values())
+        self.total = 0
+
+    def push(self, value):
+        self.total += 1
+        for window in self._windows:
+            window.push(value)
+
+    def __getitem__(self, size):
+        return self.windows[size]
+
+    def summary(self):
+        return {size: window.summary() for size, window in self.windows.items()}
+
+class GaiaMap:
+    """
+    Mapa radius_kpc -> delta_F de Gaia para cruzar alertas de una en una.
+    `lookup` da el mismo resultado que RadiusIndex.lookup (vecino más
+    cercano; ante empates, la fila que aparece primero) con una búsqueda
+    binaria sobre listas de Python, sin pasar por NumPy. `add` inserta
+    filas nuevas del mapa en su sitio sin reconstruir el índice.
+    """
+
+    def __init__(self, radius=(), delta_f=()):
+        # Un radio por entrada (el de la fila que aparece primero) y su valor
+        self._radius = []
+        self._delta_f = []
+        self._row = []
+        self._n_rows = 0
+        self.add(radius, delta_f)
+
+    @classmethod
+    def from_register(cls, path):
+        """Mapa a partir de un registro de Gaia (radius_kpc, delta_F_calculado)."""
+        from .registers import read_register
+        data = read_register(path, columns=['radius_kpc', 'delta_F_calculado'], as_frame=False)
+        return cls(data['radius_kpc'], data['delta_F_calculado'])
+
+    def __len__(self):
+        return len(self._radius)
+
+    def add(self, radius, delta_f):
+        """Añade filas al mapa (escalares o secuencias)."""
+        radius = np.atleast_1d(np.asarray(radius, dtype=np.float64)).tolist()
+        delta_f = np.atleast_1d(np.asarray(delta_f, dtype=np.float64)).tolist()
+        if len(radius) != len(delta_f):
+            raise ValueError("radius y delta_f deben tener la misma longitud")
+        if not self._radius and len(radius) > 1:
+            self._build(radius, delta_f)
+            return
+        for r, value in zip(radius, delta_f):
+            row = self._n_rows
+            self._n_rows += 1
+            if r != r:
+                continue
+            pos = bisect_left(self._radius, r)
+            if pos < len(self._radius) and self._radius[pos] == r:
+                continue  # radio repetido: manda la primera fila
+            self._radius.insert(pos, r)
+            self._delta_f.insert(pos, value)
+            self._row.insert(pos, row)
+
+    def _build(self, radius, delta_f):
+        # Mapa vacío: una ordenación estable en lugar de inserciones una a una
+        r = np.asarray(radius)
+        rows = np.flatnonzero(~np.isnan(r))
+        if not len(rows):
+            self._n_rows += len(r)  # todos los radios son NaN: nada que indexar
+            return
+        rows = rows[np.argsort(r[rows], kind='stable')]
+        keep = np.r_[True, np.diff(r[rows]) != 0]
+        rows = rows[keep]
+        self._radius = r[rows].tolist()
+        self._delta_f = np.asarray(delta_f)[rows].tolist()
+        self._row = (rows + self._n_rows).tolist()
+        self._n_rows += len(r)
+
+    def lookup(self, r, interpolate=False):
+        """delta_F a la distancia `r` (NaN si `r` es NaN o el mapa está vacío)."""
+        radius = self._radius
+        if r != r or not radius:
+            return float('nan')
+        pos = bisect_left(radius, r)
+        if pos == 0:
+            return self._delta_f[0]
+        if pos == len(radius):
+            return self._delta_f[-1]
+        if radius[pos] == r:
+            return self._delta_f[pos]
+        left = pos - 1
+        if interpolate:
+            # Misma fórmula y orden de operaciones que np.interp (bit a bit)
+            x0, x1 = radius[left], radius[pos]
+            y0, y1 = self._delta_f[left], self._delta_f[pos]
+            return (y1 - y0) / (x1 - x0) * (r - x0) + y0
+        d_left, d_right = r - radius[left], radius[pos] - r
+        if d_left < d_right or (d_left == d_right and self._row[left] < self._row[pos]):
+            return self._delta_f[left]
+        return self._delta_f[pos]
+
+class EventIngestor:
+    """
+    Procesa alertas (dicts) una a una y mantiene ventanas deslizantes de
+    delta_F por tipo: 'ligo' (delta_f_evento) y 'fermi' (delta_F_red).
+    Una alerta es 'fermi' si trae e_peak_kev; si no, 'ligo' (con m1 y m2 o
+    la masa total, y la energía irradiada). `on_event(evento)` se llama con
+    cada alerta enriquecida. La latencia por alerta (µs) se guarda en una
+    ventana del mayor tamaño (`latency_us`).
+    """
+
+    def __init__(self, windows=WINDOW_SIZES, gaia=None, interpolate=False, on_event=None):
+        self.gaia = gaia
+        self.interpolate = interpolate
+        self.on_event = on_event
+        self.rolling = {'ligo': RollingStats(windows), 'fermi': RollingStats(windows)}
+        self.latency_us = RollingWindow(max(windows))
+        self.counts = {'ligo': 0, 'fermi': 0, 'rejected': 0}
+
+    def process(self, event):
+        """Enriquece una alerta (devuelve un dict nuevo) y actualiza las ventanas."""
+        t0 = time.perf_counter()
+        out = dict(event)
+        try:
+            if _field(event, 'e_peak_kev') is not None:
+                kind, value = 'fermi', self._fermi(event, out)
+            else:
+                kind, value = 'ligo', self._ligo(event, out)
+        except (TypeError, ValueError, ZeroDivisionError) as exc:
+            self.counts['rejected'] += 1
+            out['error'] = str(exc)
+            return out
+        out['kind'] = kind
+        self.counts[kind] += 1
+        if value == value:
+            self.rolling[kind].push(value)
+        self.latency_us.push((time.perf_counter() - t0) * 1e6)
+        if self.on_event is not None:
+            self.on_event(out)
+        return out
+
+    def _ligo(self, event, out):
+        m_total = _field(event, 'm_total')
+        if m_total is None:
+            m1, m2 = _field(event, 'm1'), _field(event, 'm2')
+            if m1 is None or m2 is None:
+                raise ValueError("Alerta LIGO sin masas (m1 y m2 o la masa total)")
+            m_total = float(m1) + float(m2)
+        e_rad = _field(event, 'e_rad')
+        if e_rad is None:
+            raise ValueError("Alerta LIGO sin energía irradiada")
+        # Delta_F_Ligo = Pausa + (E_rad / M_total) * log(CHI)
+        delta_f = DELTA_F_ORIGINAL + (float(e_rad) / float(m_total)) * LOG_CHI
+        out['delta_f_evento'] = delta_f
+        out['tension_red'] = delta_f - DELTA_F_ORIGINAL
+        out['tipo'] = 'Estabilización' if delta_f > DELTA_F_ORIGINAL else 'Rama Joven'
+        return delta_f
+
+    def _fermi(self, event, out):
+        distance = _field(event, 'distance_kpc')
+        if self.gaia is None or distance is None:
+            delta_f = float('nan')
+        else:
+            delta_f = self.gaia.lookup(float(distance), self.interpolate)
+        out['delta_F_red'] = delta_f
+        # E_emitida = E_obs / (12.65^(1 - delta_F))
+        out['E_fuente_estimada'] = float(_field(event, 'e_peak_kev')) / CHI ** (1 - delta_f)
+        return delta_f
+
+    def stats(self):
+        """
+        Resumen O(1) por ventana: {tipo: {tamaño: {count, mean, std, min,
+        max, last}}}, más 'latency_us' y los contadores por tipo.
+        """
+        out = {name: stats.summary() for name, stats in self.rolling.items()}
+        out['latency_us'] = self.latency_us.summary()
+        out['counts'] = dict(self.counts)
+        return out
+
+    async def consume(self, source):
+        """Procesa todas las alertas de un iterable asíncrono (o síncrono). Devuelve cuántas."""
+        n = 0
+        t0 = time.perf_counter()
+        if hasattr(source, '__aiter__'):
+            async for event in source:
+                self.process(event)
+                n += 1
+        else:
+            for event in source:
+                self.process(event)
+                n += 1
+        REGISTRY.record('ingest.consume', time.perf_counter() - t0, items=n)
+        return n
+
+    async def serve(self, host='127.0.0.1', port=8766, unix_path=None):
+        """
+        Servidor TCP (o socket Unix) que recibe una alerta JSON por línea.
+        Devuelve el servidor de asyncio; las líneas inválidas se cuentan
+        como rechazadas.
+        """
+        async def handle(reader, writer):
+            try:
+                async for line in reader:
+                    event = _parse_line(line)
+                    if event is None:
+                        self.counts['rejected'] += 1
+                    else:
+                        self.process(event)
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+
+        if unix_path:
+            return await asyncio.start_unix_server(handle, path=unix_path)
+        return await asyncio.start_server(handle, host, port)
+
+def _parse_line(line):
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None
+    return event if isinstance(event, dict) else None
+
+async def tail_jsonl(path, poll_interval=0.05, from_start=True, stop=None):
+    """
+    Alertas de un archivo de líneas JSON que sigue creciendo (como `tail -f`).
+    Las líneas incompletas esperan al resto; las inválidas se saltan. Termina
+    cuando `stop` (un asyncio.Event) está activo y no quedan líneas nuevas.
+    """
+    with open(path, 'rb') as f:
+        if not from_start:
+            f.seek(0, 2)
+        partial = b''
+        while True:
+            chunk = f.readline()
+            if chunk:
+                partial += chunk
+                if not partial.endswith(b'\n'):
+                    continue
+                event = _parse_line(partial)
+                partial = b''
+                if event is not None:
+                    yield event
+                continue
+            if stop is not None and stop.is_set():
+                return
+            await asyncio.sleep(poll_interval)
+
+async def replay_register(path, rate=None):
+    """
+    Reproduce un registro (CSV, Parquet o .npcol) como flujo de alertas, una
+    por fila. Con `rate` (alertas por segundo) se espacian en el tiempo.
+    """
+    from .registers import read_register
+    df = read_register(path)
+    delay = 1 / rate if rate else 0
+    for event in df.to_dict('records'):
+        yield event
+        await asyncio.sleep(delay)
+
+async def _main(args):
+    gaia = GaiaMap.from_register(args.gaia) if args.gaia else None
+    printer = (lambda ev: print(json.dumps(ev, ensure_ascii=False, default=str))) if args.echo else None
+    ingestor = EventIngestor(gaia=gaia, interpolate=args.interpolate, on_event=printer)
+    try:
+        if args.tail:
+            await ingestor.consume(tail_jsonl(args.tail, from_start=not args.new_only))
+        elif args.replay:
+            await ingestor.consume(replay_register(args.replay, args.rate))
+        else:
+            server = await ingestor.serve(args.host, args.port, args.unix)
+            print(f"📡 Escuchando alertas en {args.unix or f'{args.host}:{args.port}'}")
+            async with server:
+                await server.serve_forever()
+    finally:
+        print(json.dumps(ingestor.stats(), indent=1, default=str))
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Ingesta de alertas LIGO / Fermi en directo")
+    parser.add_argument('--gaia', default=None, help="Registro de Gaia para el cruce de alertas Fermi")
+    parser.add_argument('--interpolate', action='store_true')
+    parser.add_argument('--tail', default=None, help="Archivo de líneas JSON a seguir")
+    parser.add_argument('--new-only', action='store_true', help="Con --tail, ignora las líneas ya escritas")
+    parser.add_argument('--replay', default=None, help="Registro a reproducir como flujo")
+    parser.add_argument('--rate', type=float, default=None)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--unix', default=None)
+    parser.add_argument('--echo', action='store_true', help="Imprime cada alerta enriquecida")
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,211 @@
+"""
+MFSU V2 - Métricas de ejecución
+Spans por etapa (preprocesado, máscara de estrellas, box-counting, ajuste
+radial, cruce, E/S...) con duración, número de elementos y pico de memoria,
+acumulados en un registro exportable a JSON o a texto de Prometheus.
+
+    from core.metrics import span, REGISTRY
+
+    with span('gaia.delta_f', items=len(df)):
+        ...
+
+    @span('sparc.fit')
+    def fit(...): ...
+
+    REGISTRY.export('metricas.prom')
+
+El pico de memoria usa tracemalloc y sólo se mide si está activado
+(`track_memory=True` en el span, `set_memory_tracking(True)` o la variable
+de entorno MFSU_TRACK_MEMORY=1), porque ralentiza las asignaciones.
+"""
+
+import os
+import json
+import math
+import time
+import threading
+import functools
+import tracemalloc
+
+# Cubos (segundos) de los histogramas de latencia por etapa
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+_track_memory = os.environ.get('MFSU_TRACK_MEMORY', '') not in ('', '0')
+
+def set_memory_tracking(enabled):
+    """Activa o desactiva la medida del pico de memoria en todos los spans."""
+    global _track_memory
+    _track_memory = bool(enabled)
+
+class MetricsRegistry:
+    """
+    Estadísticas acumuladas por etapa: número de llamadas, duración total,
+    mínima y máxima, histograma de duraciones, elementos procesados y pico
+    de memoria. Es seguro entre hilos; cada proceso tiene su registro
+    (los workers pueden devolver `snapshot()` y el principal hacer `merge()`).
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def _new_stage(self):
+        return {
+            'count': 0, 'seconds_sum': 0.0, 'seconds_min': math.inf, 'seconds_max': 0.0,
+            'items': 0, 'peak_bytes': 0, 'buckets': [0] * len(self.buckets),
+        }
+
+    def record(self, name, seconds, items=None, peak_bytes=None):
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = self._new_stage()
+            stage['count'] += 1
+            stage['seconds_sum'] += seconds
+            stage['seconds_min'] = min(stage['seconds_min'], seconds)
+            stage['seconds_max'] = max(stage['seconds_max'], seconds)
+            if items:
+                stage['items'] += int(items)
+            if peak_bytes:
+                stage['peak_bytes'] = max(stage['peak_bytes'], int(peak_bytes))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    stage['buckets'][i] += 1
+                    break
+
+    def snapshot(self):
+        """Copia de las estadísticas: {etapa: {...}}."""
+        with self._lock:
+            return {name: {**s, 'buckets': list(s['buckets'])} for name, s in self._stages.items()}
+
+    def merge(self, snapshot):
+        """Suma las estadísticas de otro registro (p. ej. de un worker)."""
+        with self._lock:
+            for name, other in snapshot.items():
+                stage = self._stages.get(name)
+                if stage is None:
+                    stage = self._stages[name] = self._new_stage()
+                for key in ('count', 'seconds_sum', 'items'):
+                    stage[key] += other[key]
+                stage['seconds_min'] = min(stage['seconds_min'], other['seconds_min'])
+                stage['seconds_max'] = max(stage['seconds_max'], other['seconds_max'])
+                stage['peak_bytes'] = max(stage['peak_bytes'], other['peak_bytes'])
+                stage['buckets'] = [a + b for a, b in zip(stage['buckets'], other['buckets'])]
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def to_json(self):
+        stages = self.snapshot()
+        for stage in stages.values():
+            stage['seconds_mean'] = stage['seconds_sum'] / stage['count'] if stage['count'] else None
+            if stage['seconds_min'] == math.inf:
+                stage['seconds_min'] = None
+            stage['buckets'] = dict(zip((str(b) for b in self.buckets), stage['buckets']))
+        return json.dumps({'stages': stages}, indent=1)
+
+    def to_prometheus(self, prefix='mfsu'):
+        """Formato de exposición de texto de Prometheus (histograma por etapa)."""
+        stages = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_stage_duration_seconds Duración de cada etapa.",
+            f"# TYPE {prefix}_stage_duration_seconds histogram",
+        ]
+        for name, s in sorted(stages.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, s['buckets']):
+                cumulative += n
+                lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {s["count"]}')
+            lines.append(f'{prefix}_stage_duration_seconds_sum{{stage="{name}"}} {s["seconds_sum"]}')
+            lines.append(f'{prefix}_stage_duration_seconds_count{{stage="{name}"}} {s["count"]}')
+        lines += [
+            f"# HELP {prefix}_stage_items_total Elementos procesados por etapa.",
+            f"# TYPE {prefix}_stage_items_total counter",
+        ]
+        lines += [f'{prefix}_stage_items_total{{stage="{name}"}} {s["items"]}' for name, s in sorted(stages.items())]
+        lines += [
+            f"# HELP {prefix}_stage_peak_bytes Pico de memoria asignada durante la etapa.",
+            f"# TYPE {prefix}_stage_peak_bytes gauge",
+        ]
+        lines += [f'{prefix}_stage_peak_bytes{{stage="{name}"}} {s["peak_bytes"]}' for name, s in sorted(stages.items())]
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path):
+        """Escribe las métricas en `path`: Prometheus si termina en .prom, si no JSON."""
+        text = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+REGISTRY = MetricsRegistry()
+
+def export_from_env(registry=REGISTRY):
+    """Exporta el registro a la ruta de MFSU_METRICS, si está definida."""
+    path = os.environ.get('MFSU_METRICS')
+    if path:
+        registry.export(path)
+    return path
+
+_local = threading.local()
+
+class span:
+    """
+    Mide una etapa. Se usa como context manager (`with span(...) as s`,
+    pudiendo fijar `s.items` dentro) o como decorador (`@span('nombre')`).
+    Como decorador, `items` puede ser una función de los mismos argumentos
+    que la decorada, p. ej. `items=lambda self, image, *a, **k: image.size`.
+    """
+
+    def __init__(self, name, items=None, registry=None, track_memory=None):
+        self.name = name
+        self.items = items
+        self.registry = registry or REGISTRY
+        self._track_arg = track_memory
+        self.track_memory = _track_memory if track_memory is None else track_memory
+        self.seconds = None
+        self.peak_bytes = None
+
+    def __enter__(self):
+        self._own_tracing = False
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._own_tracing = True
+            # Los spans anidados reinician el pico: se conserva el de los spans abiertos
+            stack = getattr(_local, 'stack', None)
+            if stack is None:
+                stack = _local.stack = []
+            peak = tracemalloc.get_traced_memory()[1]
+            for parent in stack:
+                parent._peak = max(parent._peak, peak - parent._base)
+            self._base = tracemalloc.get_traced_memory()[0]
+            self._peak = 0
+            tracemalloc.reset_peak()
+            stack.append(self)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._t0
+        if self.track_memory:
+            _local.stack.pop()
+            self._peak = max(self._peak, tracemalloc.get_traced_memory()[1] - self._base)
+            self.peak_bytes = self._peak
+            if _local.stack:
+                parent = _local.stack[-1]
+                parent._peak = max(parent._peak, self._peak + self._base - parent._base)
+            if self._own_tracing:
+                tracemalloc.stop()
+        self.registry.record(self.name, self.seconds, self.items, self.peak_bytes)
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            items = self.items(*args, **kwargs) if callable(self.items) else self.items
+            with span(self.name, items, self.registry, self._track_arg):
+                return func(*args, **kwargs)
+        return wrapper
@@ -0,0 +1,195 @@
+"""
+MFSU V2 - Registro de modelos
+Leyes de velocidad seleccionables por nombre, todas de la forma
+V = V_bar * factor(delta_F), con su inversa delta_F(V_obs / V_bar):
+
+  * 'power_law'      : Ley de Franco, V = V_bar * CHI^(1 - delta_F)
+                       (la de core.engine.predict_velocity).
+  * 'sqrt_impedance' : Ecuación Maestra Dinámica,
+                       V = V_bar * sqrt(1 + CHI * (1 - delta_F)).
+
+Cada modelo acepta escalares (ruta `math`, sin NumPy) o arrays, arrays
+enmascarados y Series, como la API por lotes de core.engine. Los modelos
+nuevos se añaden con `register_model`.
+
+La tabla de ramas (tallo, rama_1, rama_2) asigna a cada galaxia la rama de
+delta_F más cercana con una sola búsqueda ordenada sobre los puntos medios
+entre ramas, sea un valor o un catálogo entero.
+"""
+
+import math
+from bisect import bisect_right
+from .constants import CHI, DELTA_F_ORIGINAL
+from .engine import LOG_CHI, _is_scalar, _as_float_array, _wrap_like, calculate_precision_batch
+
+class MFSUModel:
+    """
+    Ley de velocidad MFSU. `factor(delta_f, chi=CHI)` y
+    `delta_from_ratio(ratio, chi=CHI)` reciben escalares o ndarrays (que se
+    difunden entre sí) y devuelven lo mismo; donde la ley no está definida
+    devuelven NaN. `chi` permite evaluar la ley con otra impedancia
+    (core.scan).
+    """
+
+    def __init__(self, name, factor, delta_from_ratio, description=''):
+        self.name = name
+        self.factor = factor
+        self.delta_from_ratio = delta_from_ratio
+        self.description = description
+
+    def __repr__(self):
+        return f"MFSUModel({self.name!r})"
+
+    def predict(self, v_bar, delta_f=DELTA_F_ORIGINAL):
+        """Velocidad predicha V = V_bar * factor(delta_F) (delta_F escalar o por elemento)."""
+        if _is_scalar(v_bar) and _is_scalar(delta_f):
+            return v_bar * self.factor(delta_f)
+        vb, m_vb = _as_float_array(v_bar)
+        df, m_df = _as_float_array(delta_f)
+        return _wrap_like(vb * self.factor(df), m_vb | m_df, v_bar, delta_f)
+
+    def invert(self, v_obs, v_bar):
+        """delta_F que reproduce V_obs a partir de V_bar (NaN donde V_bar <= 0)."""
+        if _is_scalar(v_obs) and _is_scalar(v_bar):
+            return self.delta_from_ratio(v_obs / v_bar) if v_bar > 0 else math.nan
+        import numpy as np
+        vo, m_vo = _as_float_array(v_obs)
+        vb, m_vb = _as_float_array(v_bar)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.divide(vo, vb, out=np.full(np.broadcast(vo, vb).shape, np.nan), where=vb > 0)
+        return _wrap_like(self.delta_from_ratio(ratio), m_vo | m_vb, v_obs, v_bar)
+
+MODELS = {}
+
+def register_model(model):
+    """Añade (o sustituye) un modelo en el registro y lo devuelve."""
+    MODELS[model.name] = model
+    return model
+
+def get_model(model):
+    """Devuelve el modelo registrado con ese nombre (o el propio MFSUModel)."""
+    if isinstance(model, MFSUModel):
+        return model
+    try:
+        return MODELS[model]
+    except KeyError:
+        raise ValueError(f"Modelo MFSU desconocido: {model} (disponibles: {', '.join(MODELS)})") from None
+
+# --- Ley de Franco (potencia) ---
+
+def _power_law_factor(delta_f, chi=CHI):
+    if _is_scalar(delta_f) and _is_scalar(chi):
+        return math.pow(chi, 1 - delta_f)
+    import numpy as np
+    return np.power(chi, 1 - delta_f)
+
+def _power_law_delta(ratio, chi=CHI):
+    if _is_scalar(ratio) and _is_scalar(chi):
+        log_chi = LOG_CHI if chi == CHI else math.log(chi)
+        return 1 - math.log(ratio) / log_chi if ratio > 0 else math.nan
+    import numpy as np
+    log_chi = LOG_CHI if _is_scalar(chi) and chi == CHI else np.log(chi)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(ratio > 0, 1 - np.log(ratio) / log_chi, np.nan)
+
+# --- Ecuación Maestra Dinámica (raíz de la impedancia efectiva) ---
+
+def _sqrt_impedance_factor(delta_f, chi=CHI):
+    if _is_scalar(delta_f) and _is_scalar(chi):
+        impedance = 1 + chi * (1 - delta_f)
+        return math.sqrt(impedance) if impedance >= 0 else math.nan
+    import numpy as np
+    with np.errstate(invalid='ignore'):
+        return np.sqrt(1 + chi * (1 - delta_f))
+
+def _sqrt_impedance_delta(ratio, chi=CHI):
+    # Fórmula inversa del Cap. 3: delta_F = 1 - ((V_obs / V_bar)^2 - 1) / CHI
+    return 1 - (ratio**2 - 1) / chi
+
+POWER_LAW = register_model(MFSUModel(
+    'power_law', _power_law_factor, _power_law_delta,
+    "Ley de Franco: V = V_bar * CHI^(1 - delta_F)",
+))
+SQRT_IMPEDANCE = register_model(MFSUModel(
+    'sqrt_impedance', _sqrt_impedance_factor, _sqrt_impedance_delta,
+    "Ecuación Maestra Dinámica: V = V_bar * sqrt(1 + CHI * (1 - delta_F))",
+))
+
+# --- Tabla de ramas del árbol fractal ---
+
+# Nivel de ramificación -> (nombre, delta_F), de mayor a menor saturación
+BRANCHES = (
+    ('tallo', DELTA_F_ORIGINAL),  # Galaxias masivas estables (N=0)
+    ('rama_1', 0.548),            # Espirales típicas o corrientes estelares (N=1)
+    ('rama_2', 0.315),            # Enanas o LSB: domina la impedancia (N=2)
+)
+BRANCH_NAMES = tuple(name for name, _ in BRANCHES)
+BRANCH_DELTA_F = tuple(delta_f for _, delta_f in BRANCHES)
+
+# Niveles ordenados por delta_F creciente y fronteras (puntos medios) entre ellos
+_LEVELS_BY_DELTA = sorted(range(len(BRANCHES)), key=lambda level: BRANCH_DELTA_F[level])
+_BRANCH_EDGES = [(BRANCH_DELTA_F[a] + BRANCH_DELTA_F[b]) / 2
+                 for a, b in zip(_LEVELS_BY_DELTA, _LEVELS_BY_DELTA[1:])]
+
+def branch_delta_f(branch):
+    """
+    delta_F de una rama por nombre ('tallo', 'rama_1', 'rama_2') o de un
+    array de nombres. Los nombres desconocidos usan el Tallo.
+    """
+    if isinstance(branch, str):
+        return dict(BRANCHES).get(branch, DELTA_F_ORIGINAL)
+    import numpy as np
+    names = np.asarray(branch)
+    out = np.full(names.shape, DELTA_F_ORIGINAL)
+    for name, delta_f in BRANCHES:
+        out[names == name] = delta_f
+    return out
+
+def classify_branch(delta_f):
+    """
+    Nivel de ramificación (índice de BRANCHES) de la rama con delta_F más
+    cercano. Con un array se resuelve con un único np.searchsorted contra
+    las fronteras entre ramas; los valores NaN reciben el nivel -1.
+    """
+    if _is_scalar(delta_f):
+        if math.isnan(delta_f):
+            return -1
+        return _LEVELS_BY_DELTA[bisect_right(_BRANCH_EDGES, delta_f)]
+    import numpy as np
+    values, mask = _as_float_array(delta_f)
+    levels = np.asarray(_LEVELS_BY_DELTA)[np.searchsorted(_BRANCH_EDGES, values, side='right')]
+    return np.where(np.isnan(values) | mask, -1, levels)
+
+def branch_names(levels):
+    """Nombres de rama de un array de niveles ('' para el nivel -1)."""
+    import numpy as np
+    levels = np.asarray(levels)
+    return np.where(levels >= 0, np.asarray(BRANCH_NAMES)[levels], '')
+
+def compare_models(v_obs, v_bar, models=None):
+    """
+    Compara modelos sobre un catálogo completo en una pasada por modelo.
+
+    Para cada modelo (todos los registrados por defecto): delta_F invertido,
+    rama asignada, velocidad predicha con el delta_F de esa rama y precisión
+    respecto a V_obs. Devuelve un DataFrame con columnas
+    DELTA_F_<MODELO>, RAMA_<MODELO>, V_PRED_<MODELO> y PRECISION_<MODELO>.
+    """
+    import numpy as np
+    import pandas as pd
+    v_obs, _ = _as_float_array(v_obs)
+    v_bar, _ = _as_float_array(v_bar)
+    table = np.asarray(BRANCH_DELTA_F + (math.nan,))
+
+    columns = {}
+    for model in (models or list(MODELS)):
+        model = get_model(model)
+        key = model.name.upper()
+        delta_f = model.invert(v_obs, v_bar)
+        levels = classify_branch(delta_f)
+        v_pred = model.predict(v_bar, table[levels])
+        columns[f'DELTA_F_{key}'] = delta_f
+        columns[f'RAMA_{key}'] = levels
+        columns[f'V_PRED_{key}'] = v_pred
+        columns[f'PRECISION_{key}'] = calculate_precision_batch(v_obs, v_pred)
+    return pd.DataFrame(columns)
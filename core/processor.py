@@ -1,45 +1,198 @@
 import pandas as pd
-import numpy as np
 import os
+from collections import deque
+from functools import partial
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 from .engine import predict_velocity, extract_dna, calculate_precision
-from .constants import DELTA_F_ORIGINAL, UMBRAL_PRECISION
+from .constants import UMBRAL_PRECISION
+from .sparc_io import read_rotmod, baryonic_velocity
+from .cache import cache_key
+from .registers import SCHEMAS, write_register
+from .metrics import span
 
-def process_sparc_directory(directory_path):
+SPARC_EXTENSIONS = ('.txt', '.dat')
+
+# Subir al cambiar la fila que produce process_sparc_file (invalida la caché)
+SPARC_FILE_VERSION = 1
+
+# Lotes en vuelo por worker en iter_sparc_directory
+BATCHES_PER_WORKER = 8
+
+def iter_sparc_files(directory_path):
+    """Recorre el árbol de SPARC y devuelve las rutas de las curvas de rotación."""
+    for root, dirs, files in os.walk(directory_path):
+        for file in files:
+            if file.endswith(SPARC_EXTENSIONS):
+                yield os.path.join(root, file)
+
+def process_sparc_file(path):
     """
-    Procesa masivamente archivos de SPARC y genera el Registro Maestro.
+    Procesa un único archivo SPARC y devuelve su fila del Registro Maestro.
+    Lanza la excepción original si el archivo no se puede interpretar.
+    """
+    file = os.path.basename(path)
+    # Lectura de SPARC: sólo hace falta la última fila de la curva
+    curve = read_rotmod(path, tail_only=True)
+
+    # Componentes bariónicas: Gas, Disco, Bulbo
+    v_bar = baryonic_velocity(curve)[-1]
+    v_obs = curve['v_obs'][-1]
+
+    # Ejecución del Motor MFSU
+    v_mfsu = predict_velocity(v_bar)
+    prec = calculate_precision(v_obs, v_mfsu)
+    dna = extract_dna(v_obs, v_bar)
+
+    return {
+        'GALAXY': file.split('.')[0],
+        'V_BAR': round(v_bar, 2),
+        'V_OBS': round(v_obs, 2),
+        'V_MFSU': round(v_mfsu, 2),
+        'PRECISION_%': round(prec, 2),
+        'DELTA_F_DNA': round(dna, 4),
+        'STATUS': 'ORIGINAL' if prec >= UMBRAL_PRECISION else 'BRANCH'
+    }
+
+def _process_sparc_file_safe(path, cache=None):
+    """
+    Envuelve process_sparc_file: devuelve (fila, None) o (None, fallo).
+    Con `cache` (core.cache.ResultCache) la fila se guarda por archivo,
+    indexada por su contenido, y sólo se recalculan los archivos nuevos o
+    modificados.
+    """
+    try:
+        if cache is None:
+            return process_sparc_file(path), None
+        key = cache_key('sparc_file', [path], version=SPARC_FILE_VERSION)
+        row = cache.get(key)
+        if row is None:
+            row = process_sparc_file(path)
+            cache.put(key, row, evict=False)
+        # El nombre sale de la ruta, no del contenido
+        row['GALAXY'] = os.path.basename(path).split('.')[0]
+        return row, None
+    except Exception as e:
+        return None, {'PATH': path, 'REASON': f"{type(e).__name__}: {e}"}
+
+def _process_sparc_batch(paths, cache=None):
+    """Un lote de archivos por tarea del pool (menos viajes entre procesos)."""
+    return [_process_sparc_file_safe(path, cache=cache) for path in paths]
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_sparc_directory(directory_path, workers=1, chunk_size=512, cache=None):
+    """
+    Procesa el árbol de SPARC en bloques y los entrega a medida que terminan.
+
+    Cada bloque es una tupla (filas, fallos): `filas` son los dicts del
+    Registro Maestro y `fallos` los registros {'PATH', 'REASON'} de los
+    archivos que no se pudieron leer. Con `workers` > 1 (o None = todos los
+    núcleos) la lectura se reparte en un pool de procesos. Con `cache`
+    (core.cache.ResultCache) se reutilizan las filas de los archivos que no
+    han cambiado.
     """
-    results = []
-    
     if not os.path.exists(directory_path):
         raise FileNotFoundError(f"No se encontró la carpeta: {directory_path}")
 
-    for root, dirs, files in os.walk(directory_path):
-        for file in files:
-            if file.endswith(('.txt', '.dat')):
-                try:
-                    path = os.path.join(root, file)
-                    # Lectura robusta de SPARC (skip headers)
-                    df = pd.read_csv(path, sep=r'\s+', skiprows=3, header=None)
-                    
-                    # Componentes bariónicas: Gas(3), Disco(4), Bulbo(5)
-                    v_bar = np.sqrt(df[3]**2 + df[4]**2 + df[5].fillna(0)**2).iloc[-1]
-                    v_obs = df[1].iloc[-1]
-                    
-                    # Ejecución del Motor MFSU
-                    v_mfsu = predict_velocity(v_bar)
-                    prec = calculate_precision(v_obs, v_mfsu)
-                    dna = extract_dna(v_obs, v_bar)
-                    
-                    results.append({
-                        'GALAXY': file.split('.')[0],
-                        'V_BAR': round(v_bar, 2),
-                        'V_OBS': round(v_obs, 2),
-                        'V_MFSU': round(v_mfsu, 2),
-                        'PRECISION_%': round(prec, 2),
-                        'DELTA_F_DNA': round(dna, 4),
-                        'STATUS': 'ORIGINAL' if prec >= UMBRAL_PRECISION else 'BRANCH'
-                    })
-                except Exception as e:
-                    continue
-                    
-    return pd.DataFrame(results).sort_values(by='PRECISION_%', ascending=False)
+    paths = iter_sparc_files(directory_path)
+    n_workers = workers or os.cpu_count() or 1
+    process = partial(_process_sparc_file_safe, cache=cache)
+
+    if n_workers == 1:
+        for chunk in _chunks(paths, chunk_size):
+            with span('sparc.chunk', items=len(chunk)):
+                outcome = _split_outcomes(map(process, chunk))
+            if cache is not None:
+                cache.evict()
+            yield outcome
+        return
+
+    # Ventana acotada de lotes en vuelo: cada lote que termina se repone
+    # enseguida, así los workers no esperan a que se cierre cada bloque.
+    # Los resultados se recogen en orden de envío (el de iter_sparc_files).
+    batches = _chunks(paths, max(1, chunk_size // (n_workers * 4)))
+    process_batch = partial(_process_sparc_batch, cache=cache)
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        pending = deque(pool.submit(process_batch, batch)
+                        for batch in islice(batches, BATCHES_PER_WORKER * n_workers))
+        outcomes = []
+        while pending:
+            with span('sparc.chunk') as s:
+                while pending and len(outcomes) < chunk_size:
+                    outcomes.extend(pending.popleft().result())
+                    batch = next(batches, None)
+                    if batch is not None:
+                        pending.append(pool.submit(process_batch, batch))
+                chunk, outcomes = outcomes[:chunk_size], outcomes[chunk_size:]
+                s.items = len(chunk)
+                outcome = _split_outcomes(chunk)
+            if cache is not None:
+                cache.evict()
+            yield outcome
+        if outcomes:
+            yield _split_outcomes(outcomes)
+
+def _split_outcomes(outcomes):
+    rows, failures = [], []
+    for row, failure in outcomes:
+        if failure is None:
+            rows.append(row)
+        else:
+            failures.append(failure)
+    return rows, failures
+
+def write_sparc_register(directory_path, output_path, workers=None, chunk_size=512, cache=None):
+    """
+    Genera el Registro Maestro en disco con el esquema 'sparc_core'. En CSV
+    se escribe de forma incremental (un bloque cada vez), sin mantener todas
+    las galaxias en memoria; en Parquet o .npcol se escribe al terminar.
+    Las filas quedan en orden de llegada; devuelve la lista de fallos.
+    """
+    schema = SCHEMAS['sparc_core']
+    streaming = output_path.lower().endswith('.csv')
+    failures = []
+    pending = []
+    header = True
+    if streaming:
+        # Archivo vacío: si ningún bloque tiene filas, el registro queda sin contenido
+        open(output_path, 'w').close()
+    for rows, chunk_failures in iter_sparc_directory(directory_path, workers, chunk_size, cache):
+        failures.extend(chunk_failures)
+        if rows and streaming:
+            write_register(pd.DataFrame(rows), output_path, schema, append=not header)
+            header = False
+        else:
+            pending.extend(rows)
+    if not streaming:
+        write_register(pd.DataFrame(pending, columns=list(schema)), output_path, schema)
+    return failures
+
+@span('sparc.process_directory')
+def process_sparc_directory(directory_path, workers=1, return_failures=False, cache=None):
+    """
+    Procesa masivamente archivos de SPARC y genera el Registro Maestro.
+    Con `return_failures=True` devuelve también los archivos descartados.
+    Con `cache` sólo se procesan las galaxias nuevas o modificadas.
+    """
+    results = []
+    failures = []
+
+    for rows, chunk_failures in iter_sparc_directory(directory_path, workers, cache=cache):
+        results.extend(rows)
+        failures.extend(chunk_failures)
+
+    register = pd.DataFrame(results)
+    if not register.empty:
+        register = register.sort_values(by='PRECISION_%', ascending=False)
+    if return_failures:
+        return register, failures
+    return register
@@ -1,36 +1,178 @@
 """
 MFSU Quaternion Engine V2.2 - Diamond Edition
 Calcula el giro del espacio-tiempo basado en la Impedancia 12.65.
+
+`MFSUQuaternion` acepta un nivel de ramificación `n` escalar o un array de
+niveles; `QuaternionArray` guarda N cuaterniones (w, x, y, z) en un único
+buffer contiguo (N, 4) float64 para productos, composición y rotaciones
+en bloque sin crear un objeto por cuaternión.
 """
 
 import numpy as np
-from .constants import CHI, DELTA_F, FRACTAL_SCALE_V2
+from .constants import CHI, DELTA_F, RU, FRACTAL_SCALE_V2
 
 class MFSUQuaternion:
     def __init__(self, n=0):
         # El ángulo de fase se deriva de la relación de impedancia crítica
-        self.theta = np.arctan(CHI / (CHI + 1)) 
-        self.delta_f = DELTA_F * np.exp(-0.079 * n)
+        self.theta = np.arctan(CHI / (CHI + 1))
+        self.delta_f = DELTA_F * np.exp(-RU * np.asarray(n, dtype=np.float64))
 
     def get_rotation_operator(self):
         """
         Genera el operador de rotación (q) para el vacío fractal.
+        Con un array de niveles `n`, q_xyz es un array del mismo tamaño.
         """
         # q = cos(theta/2) + u * sin(theta/2)
         q_w = np.cos(self.theta / 2)
         q_xyz = np.sin(self.theta / 2) * self.delta_f
-        
+
         return q_w, q_xyz
 
+    def as_quaternions(self, axis=(0.0, 0.0, 1.0)):
+        """Operadores de rotación como QuaternionArray, con la parte vectorial sobre `axis`."""
+        q_w, q_xyz = self.get_rotation_operator()
+        q_xyz = np.atleast_1d(q_xyz)
+        axis = np.asarray(axis, dtype=np.float64)
+        axis = axis / np.linalg.norm(axis)
+        q = np.empty((len(q_xyz), 4))
+        q[:, 0] = q_w
+        q[:, 1:] = q_xyz[:, None] * axis
+        return QuaternionArray(q)
+
     def apply_quaternion_boost(self, velocity):
         """
         Aplica la magnificación topológica mediante rotación no-euclidiana.
         Este motor es el que explica físicamente el 'boost' del 1.0858.
         """
         qw, qv = self.get_rotation_operator()
-        
+
         # Factor de Magnificación (Boost Estructural)
         # Sustituye la necesidad de materia oscura por curvatura cuaterniónica
-        magnification = (CHI / (CHI - 1)) 
-        
+        magnification = (CHI / (CHI - 1))
+
         return velocity * magnification * FRACTAL_SCALE_V2
+
+class QuaternionArray:
+    """
+    N cuaterniones (w, x, y, z) en un buffer contiguo (N, 4) float64.
+    Las operaciones entre dos arrays difunden como NumPy: N con N, o N con 1.
+    """
+
+    __slots__ = ('q',)
+
+    def __init__(self, q):
+        self.q = np.ascontiguousarray(q, dtype=np.float64).reshape(-1, 4)
+
+    @classmethod
+    def from_components(cls, w, x, y, z):
+        w, x, y, z = np.broadcast_arrays(*(np.atleast_1d(np.asarray(c, dtype=np.float64)) for c in (w, x, y, z)))
+        return cls(np.stack([w, x, y, z], axis=-1))
+
+    @classmethod
+    def from_axis_angle(cls, axis, angle):
+        """Rotaciones unitarias de `angle` radianes alrededor de `axis` (3,) o (N, 3)."""
+        axis = np.atleast_2d(np.asarray(axis, dtype=np.float64))
+        axis = axis / np.linalg.norm(axis, axis=1, keepdims=True)
+        half = np.atleast_1d(np.asarray(angle, dtype=np.float64)) / 2
+        n = max(len(axis), len(half))
+        q = np.empty((n, 4))
+        q[:, 0] = np.cos(half)
+        q[:, 1:] = np.sin(half)[:, None] * axis
+        return cls(q)
+
+    @classmethod
+    def identity(cls, n=1):
+        q = np.zeros((n, 4))
+        q[:, 0] = 1.0
+        return cls(q)
+
+    def __len__(self):
+        return len(self.q)
+
+    def __getitem__(self, item):
+        return QuaternionArray(self.q[item])
+
+    def __repr__(self):
+        return f"QuaternionArray(n={len(self)})"
+
+    @property
+    def w(self):
+        return self.q[:, 0]
+
+    @property
+    def xyz(self):
+        return self.q[:, 1:]
+
+    def conjugate(self):
+        q = self.q.copy()
+        q[:, 1:] *= -1
+        return QuaternionArray(q)
+
+    def norm(self):
+        return np.sqrt(np.einsum('ij,ij->i', self.q, self.q))
+
+    def normalized(self):
+        return QuaternionArray(self.q / self.norm()[:, None])
+
+    def __mul__(self, other):
+        """Producto de Hamilton elemento a elemento (self * other)."""
+        return QuaternionArray(_hamilton(self.q, other.q))
+
+    def compose(self):
+        """
+        Composición acumulada: el elemento i es q[0] * q[1] * ... * q[i].
+
+        Barrido prefijo por bloques de ~sqrt(N): dentro de cada bloque se
+        acumula columna a columna (vectorizado sobre todos los bloques), los
+        totales de bloque se componen recursivamente y se aplican de una vez.
+        El trabajo es O(N) con ~2 sqrt(N) productos de Hamilton vectorizados.
+        """
+        n = len(self.q)
+        if n <= 1:
+            return QuaternionArray(self.q.copy())
+
+        block = int(np.ceil(np.sqrt(n)))
+        n_blocks = -(-n // block)
+        acc = np.zeros((n_blocks * block, 4))
+        acc[:, 0] = 1.0  # relleno con la identidad
+        acc[:n] = self.q
+        acc = acc.reshape(n_blocks, block, 4)
+
+        for j in range(1, block):
+            acc[:, j] = _hamilton(acc[:, j - 1], acc[:, j])
+        if n_blocks > 1:
+            totals = QuaternionArray(acc[:, -1]).compose().q
+            acc[1:] = _hamilton(totals[:-1, None, :], acc[1:])
+        return QuaternionArray(acc.reshape(-1, 4)[:n])
+
+    def rotate(self, vectors):
+        """
+        Rota vectores (N, 3) o (3,) con v' = q v q*. Los cuaterniones se
+        normalizan antes de rotar.
+        """
+        v = np.atleast_2d(np.asarray(vectors, dtype=np.float64))
+        q = self.normalized().q
+        w, u = q[:, :1], q[:, 1:]
+        # Forma desarrollada de q v q*: t = 2 u x v ; v' = v + w t + u x t
+        t = 2 * np.cross(u, v)
+        return v + w * t + np.cross(u, t)
+
+def _hamilton(a, b):
+    """Producto de Hamilton sobre arrays (..., 4) con difusión de NumPy."""
+    w1, x1, y1, z1 = a[..., 0], a[..., 1], a[..., 2], a[..., 3]
+    w2, x2, y2, z2 = b[..., 0], b[..., 1], b[..., 2], b[..., 3]
+    out = np.empty(np.broadcast_shapes(a.shape, b.shape))
+    out[..., 0] = w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2
+    out[..., 1] = w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2
+    out[..., 2] = w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2
+    out[..., 3] = w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2
+    return out
+
+def quaternion_trajectory(n_levels, v0=(1.0, 0.0, 0.0), axis=(0.0, 0.0, 1.0)):
+    """
+    Trayectoria de un vector de velocidad bajo la rotación MFSU acumulada
+    de los niveles `n_levels` (un paso por nivel). Devuelve un array (N, 3).
+    Cada operador se normaliza antes de componer (sólo importa su giro).
+    """
+    steps = MFSUQuaternion(n_levels).as_quaternions(axis).normalized().compose()
+    return steps.rotate(v0)
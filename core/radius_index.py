@@ -0,0 +1,86 @@
+"""
+MFSU V2 - Índice de radios
+Cruce por vecino más cercano contra el mapa de Gaia (radius_kpc -> delta_F)
+sin recorrer el catálogo completo para cada evento.
+"""
+
+import numpy as np
+
+class RadiusIndex:
+    """
+    Índice construido una sola vez sobre las coordenadas de referencia.
+
+    Con coordenadas 1D (radio) usa un array ordenado y np.searchsorted;
+    con coordenadas N-D (n_filas, n_dims) usa scipy.spatial.cKDTree.
+    En 1D reproduce exactamente `(ref - r).abs().idxmin()`: ante empates
+    gana la fila de referencia que aparece primero.
+    """
+
+    def __init__(self, coords, values):
+        coords = np.asarray(coords, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if len(coords) != len(values):
+            raise ValueError("coords y values deben tener la misma longitud")
+
+        valid = ~np.isnan(coords).reshape(len(coords), -1).any(axis=1)
+        if not valid.any():
+            raise ValueError("El índice necesita al menos una coordenada válida")
+        self.rows = np.flatnonzero(valid)
+        self.values = values
+        self.ndim = 1 if coords.ndim == 1 else coords.shape[1]
+
+        if self.ndim == 1:
+            order = np.argsort(coords[valid], kind='stable')
+            self.rows = self.rows[order]
+            self.sorted_coords = coords[valid][order]
+        else:
+            from scipy.spatial import cKDTree
+            self.tree = cKDTree(coords[valid])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def nearest(self, query):
+        """
+        Fila de referencia (posición en los arrays originales) más cercana a
+        cada consulta. Las consultas con NaN devuelven -1.
+        """
+        query = np.asarray(query, dtype=np.float64)
+        if self.ndim > 1:
+            query = query.reshape(-1, self.ndim)
+            bad = np.isnan(query).any(axis=1)
+            _, pos = self.tree.query(np.where(bad[:, None], 0.0, query))
+            return np.where(bad, -1, self.rows[pos])
+
+        r = self.sorted_coords
+        bad = np.isnan(query)
+        pos = np.searchsorted(r, query, side='left')
+        # Vecinos a ambos lados, llevados al primer elemento de su grupo de
+        # radios repetidos (el de menor fila original gracias al orden estable)
+        right = np.searchsorted(r, r[np.minimum(pos, len(r) - 1)], side='left')
+        left = np.searchsorted(r, r[np.maximum(pos - 1, 0)], side='left')
+
+        d_left = np.abs(r[left] - query)
+        d_right = np.abs(r[right] - query)
+        row_left, row_right = self.rows[left], self.rows[right]
+        take_left = (d_left < d_right) | ((d_left == d_right) & (row_left < row_right))
+        best = np.where(take_left, row_left, row_right)
+        return np.where(bad, -1, best)
+
+    def lookup(self, query, interpolate=False):
+        """
+        Valor de referencia para cada consulta. Con `interpolate=True` (sólo 1D)
+        interpola linealmente entre los dos radios vecinos en lugar de tomar
+        el más cercano; fuera del rango se usa el valor del extremo.
+        """
+        query = np.asarray(query, dtype=np.float64)
+        if interpolate:
+            if self.ndim > 1:
+                raise ValueError("La interpolación sólo está disponible para índices 1D")
+            # Un valor por radio distinto (el de la fila que aparece primero)
+            first = np.searchsorted(self.sorted_coords, self.sorted_coords, side='left')
+            unique = np.unique(first)
+            return np.interp(query, self.sorted_coords[unique], self.values[self.rows[unique]])
+
+        rows = self.nearest(query)
+        return np.where(rows >= 0, self.values[np.maximum(rows, 0)], np.nan)
@@ -0,0 +1,195 @@
+"""
+MFSU V2 - E/S de Registros Maestros
+Lectura y escritura de los registros en formato binario columnar con
+esquemas tipados, manteniendo la exportación CSV para los papers.
+
+Formatos (según la extensión de la ruta):
+  * `.parquet` : Apache Parquet (requiere pyarrow).
+  * `.npcol`   : directorio con un `.npy` por columna y `_schema.json`;
+                 sin dependencias extra y con lectura mmap por columna.
+  * `.csv`     : texto, con los tipos del esquema aplicados al leer.
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+from .metrics import span
+
+# Tipos de columna: 'float64', 'int64', 'str' (texto libre) y 'category'
+SCHEMAS = {
+    'sparc': {
+        'GALAXIA': 'str', 'V_BAR (Bariónica)': 'float64', 'V_OBS (Real)': 'float64',
+        'V_MFSU (0.921)': 'float64', 'PRECISION_%': 'float64', 'DELTA_F_REAL': 'float64',
+        'DIF_ORIGINAL': 'float64', 'ESTADO': 'category',
+    },
+    'sparc_core': {
+        'GALAXY': 'str', 'V_BAR': 'float64', 'V_OBS': 'float64', 'V_MFSU': 'float64',
+        'PRECISION_%': 'float64', 'DELTA_F_DNA': 'float64', 'STATUS': 'category',
+    },
+    'jwst': {
+        'GALAXY_ID': 'str', 'REDSHIFT_Z': 'float64', 'V_BAR_KM_S': 'float64',
+        'V_OBS_JWST': 'float64', 'DELTA_F_DNA': 'float64', 'PRECISION_VS_TARGET': 'float64',
+        'BRANCH_STATUS': 'category',
+    },
+    'ligo': {
+        'EVENTO_ID': 'str', 'MASA_TOTAL_SOLAR': 'float64', 'ENERGIA_IRRADIADA_SOLAR': 'float64',
+        'DISTANCIA_MPC': 'int64', 'DELTA_F_LIGO': 'float64', 'EXCESO_PRESION': 'float64',
+        'TIPO_COLAPSO': 'category',
+    },
+    'gaia': {
+        'event_id': 'int64', 'radius_kpc': 'float64', 'v_obs_kms': 'float64',
+        'v_bar_kms': 'float64', 'delta_F_calculado': 'float64',
+    },
+    'fermi_raw': {
+        'grb_id': 'str', 'e_peak_kev': 'float64', 'fluence_erg_cm2': 'float64',
+        'delta_F_local': 'float64',
+    },
+    'fermi_master': {
+        'grb_id': 'str', 'e_peak_kev': 'float64', 'fluence_erg_cm2': 'float64',
+        'delta_F_local': 'float64', 'distancia_recorrida_kpc': 'float64',
+        'delta_F_red': 'float64', 'E_fuente_estimada': 'float64',
+    },
+}
+
+SCHEMA_FILE = '_schema.json'
+
+def detect_schema(columns):
+    """Devuelve el esquema conocido cuyas columnas coinciden exactamente, o None."""
+    for name, schema in SCHEMAS.items():
+        if list(schema) == list(columns):
+            return schema
+    return None
+
+def infer_schema(df):
+    """Esquema a partir de los dtypes de un DataFrame."""
+    schema = {}
+    for column, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            schema[column] = 'category'
+        elif pd.api.types.is_integer_dtype(dtype):
+            schema[column] = 'int64'
+        elif pd.api.types.is_numeric_dtype(dtype):
+            schema[column] = 'float64'
+        else:
+            schema[column] = 'str'
+    return schema
+
+def apply_schema(df, schema):
+    """Convierte las columnas de `df` a los tipos del esquema."""
+    out = {}
+    for column in df.columns:
+        kind = schema.get(column)
+        if kind == 'category':
+            out[column] = df[column].astype('category')
+        elif kind in ('float64', 'int64'):
+            out[column] = df[column].astype(kind)
+        else:
+            out[column] = df[column]
+    return pd.DataFrame(out, index=df.index)
+
+def _format(path):
+    ext = os.path.splitext(path.rstrip('/' + os.sep))[1].lower()
+    if ext not in ('.parquet', '.npcol', '.csv'):
+        raise ValueError(f"Formato de registro no soportado: {path}")
+    return ext
+
+@span('io.write_register', items=lambda df, *a, **k: len(df))
+def write_register(df, path, schema=None, append=False):
+    """
+    Guarda un registro con tipos explícitos. Sin `schema` se usa el esquema
+    conocido que coincida con las columnas o, si no hay, el inferido.
+    Con `append=True` (sólo CSV) las filas se añaden al final sin cabecera,
+    para escribir un registro por bloques.
+    """
+    schema = schema or detect_schema(df.columns) or infer_schema(df)
+    df = apply_schema(df, schema)
+    fmt = _format(path)
+    if append and fmt != '.csv':
+        raise ValueError(f"Sólo los registros CSV admiten escritura por bloques: {path}")
+
+    if fmt == '.csv':
+        df.to_csv(path, mode='a' if append else 'w', header=not append, index=False)
+    elif fmt == '.parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path)
+    else:
+        os.makedirs(path, exist_ok=True)
+        meta = {'n_rows': len(df), 'columns': [], 'schema': schema, 'categories': {}, 'nulls': {}}
+        for i, column in enumerate(df.columns):
+            file_name = f"{i:03d}.npy"
+            if schema[column] == 'category':
+                np.save(os.path.join(path, file_name), df[column].cat.codes.to_numpy(np.int32))
+                meta['categories'][column] = [str(c) for c in df[column].cat.categories]
+            elif schema[column] == 'str':
+                # Los valores ausentes se guardan como '' junto a su máscara
+                # (sólo si hay alguno), no como el texto 'nan' o 'None'
+                null = df[column].isna().to_numpy()
+                values = df[column].to_numpy(dtype=object)
+                values[null] = ''
+                np.save(os.path.join(path, file_name), values.astype(str))
+                if null.any():
+                    mask_name = f"{i:03d}_null.npy"
+                    np.save(os.path.join(path, mask_name), null)
+                    meta['nulls'][column] = mask_name
+            else:
+                np.save(os.path.join(path, file_name), df[column].to_numpy(dtype=schema[column]))
+            meta['columns'].append([column, file_name])
+        with open(os.path.join(path, SCHEMA_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=1)
+
+def register_columns(path):
+    """Nombres de las columnas de un registro, sin leer sus datos."""
+    fmt = _format(path)
+    if fmt == '.csv':
+        return list(pd.read_csv(path, nrows=0).columns)
+    if fmt == '.parquet':
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(path).names)
+    with open(os.path.join(path, SCHEMA_FILE), encoding='utf-8') as f:
+        return [c for c, _ in json.load(f)['columns']]
+
+@span('io.read_register')
+def read_register(path, columns=None, mmap=True, as_frame=True):
+    """
+    Lee un registro cargando sólo las `columns` pedidas.
+
+    Con `.npcol` y `mmap=True` las columnas se abren como np.memmap; con
+    `as_frame=False` se devuelve un dict {columna: ndarray} sin copiar los
+    datos (las categóricas se devuelven como pd.Categorical).
+    """
+    fmt = _format(path)
+
+    if fmt == '.csv':
+        df = pd.read_csv(path, usecols=columns)
+        schema = detect_schema(pd.read_csv(path, nrows=0).columns) or {}
+        df = apply_schema(df, schema)
+        return df if as_frame else {c: df[c].to_numpy() for c in df.columns}
+
+    if fmt == '.parquet':
+        import pyarrow.parquet as pq
+        df = pq.read_table(path, columns=columns, memory_map=mmap).to_pandas()
+        return df if as_frame else {c: df[c].to_numpy() for c in df.columns}
+
+    with open(os.path.join(path, SCHEMA_FILE), encoding='utf-8') as f:
+        meta = json.load(f)
+    files = dict(meta['columns'])
+    wanted = columns if columns is not None else [c for c, _ in meta['columns']]
+
+    data = {}
+    for column in wanted:
+        if column not in files:
+            raise KeyError(f"Columna inexistente en el registro: {column}")
+        arr = np.load(os.path.join(path, files[column]), mmap_mode='r' if mmap else None)
+        if column in meta['categories']:
+            arr = pd.Categorical.from_codes(arr, meta['categories'][column])
+        elif column in meta.get('nulls', {}):
+            arr = arr.astype(object)
+            arr[np.load(os.path.join(path, meta['nulls'][column]))] = np.nan
+        data[column] = arr
+    return pd.DataFrame(data) if as_frame else data
+
+def export_csv(path, csv_path, columns=None):
+    """Exporta un registro binario a CSV (versión para los papers)."""
+    write_register(read_register(path, columns=columns, mmap=False), csv_path)
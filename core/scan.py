@@ -0,0 +1,222 @@
+"""
+MFSU V2 - Barrido de parámetros
+Evalúa una rejilla de valores (CHI, delta_F) contra los registros de SPARC,
+Gaia, JWST y LIGO a la vez, sin editar constantes ni relanzar scripts.
+
+Cada punto de la rejilla se puntúa con la precisión media, la fracción de
+objetos por encima de UMBRAL_PRECISION y la media y el RMS de los
+residuos (observado - predicho) en cada registro. La rejilla se evalúa por
+difusión de NumPy en bloques (puntos de rejilla x filas) de como mucho
+BLOCK_ELEMENTS elementos, y de cada bloque sólo se guardan sumas por punto:
+nunca se materializa el cubo rejilla x filas. Los bloques de rejilla se
+reparten entre procesos; cada proceso recibe los catálogos una sola vez y el
+resultado es idéntico con cualquier número de workers.
+
+Observables por tipo de registro:
+  * 'velocity' (SPARC, Gaia, JWST): V_obs frente a V_bar * factor(delta_F, CHI)
+    del modelo elegido (core.models).
+  * 'ligo': DELTA_F_LIGO frente a delta_F + (E_rad / M_total) * ln(CHI).
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from .constants import UMBRAL_PRECISION
+from .models import get_model
+from .registers import read_register, register_columns
+from .synthetic import chunk_bounds
+from .metrics import span
+
+# Tamaño máximo de cada bloque (puntos de rejilla x filas) en elementos
+BLOCK_ELEMENTS = 2_000_000
+
+# Puntos de rejilla por tarea enviada a los workers
+GRID_BLOCK = 64
+
+# Columnas que lee el barrido en cada registro (variantes por orden):
+# (tipo, columna observada, columnas de entrada...)
+SCAN_COLUMNS = {
+    'sparc': [('velocity', 'V_OBS (Real)', 'V_BAR (Bariónica)'),
+              ('velocity', 'V_OBS', 'V_BAR')],
+    'gaia': [('velocity', 'v_obs_kms', 'v_bar_kms')],
+    'jwst': [('velocity', 'V_OBS_JWST', 'V_BAR_KM_S')],
+    'ligo': [('ligo', 'DELTA_F_LIGO', 'ENERGIA_IRRADIADA_SOLAR', 'MASA_TOTAL_SOLAR')],
+}
+
+STATS = ('PRECISION', 'FRAC_ORIGINAL', 'RESIDUAL_MEAN', 'RESIDUAL_RMS')
+
+def velocity_catalog(v_obs, v_bar):
+    """Catálogo de velocidades para el barrido (descarta V_obs o V_bar no positivas)."""
+    v_obs = np.asarray(v_obs, dtype=np.float64)
+    v_bar = np.asarray(v_bar, dtype=np.float64)
+    keep = np.isfinite(v_obs) & np.isfinite(v_bar) & (v_obs > 0) & (v_bar > 0)
+    return ('velocity', v_obs[keep], v_bar[keep])
+
+def ligo_catalog(delta_f_ligo, e_rad, m_total):
+    """Catálogo LIGO para el barrido: DELTA_F_LIGO observado y E_rad / M_total."""
+    obs = np.asarray(delta_f_ligo, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = np.asarray(e_rad, dtype=np.float64) / np.asarray(m_total, dtype=np.float64)
+    keep = np.isfinite(obs) & np.isfinite(x) & (obs != 0)
+    return ('ligo', obs[keep], x[keep])
+
+def load_catalog(kind, path):
+    """
+    Lee de un registro (CSV, Parquet o .npcol) sólo las columnas que usa el
+    barrido. `kind` es 'sparc', 'gaia', 'jwst' o 'ligo'.
+    """
+    available = set(register_columns(path))
+    for spec in SCAN_COLUMNS[kind]:
+        if available.issuperset(spec[1:]):
+            data = read_register(path, columns=list(spec[1:]), as_frame=False)
+            columns = [np.asarray(data[c], dtype=np.float64) for c in spec[1:]]
+            return velocity_catalog(*columns) if spec[0] == 'velocity' else ligo_catalog(*columns)
+    raise KeyError(f"El registro {path} no tiene las columnas del barrido {kind}")
+
+# Catálogos de este proceso (los workers los reciben una vez al arrancar)
+_catalogs = None
+
+def _init_worker(catalogs):
+    global _catalogs
+    _catalogs = catalogs
+
+def _scan_block(task):
+    """Sumas por punto de rejilla de un bloque de la rejilla sobre todos los catálogos."""
+    chi, delta_f, model = task
+    model = get_model(model)
+    log_chi = np.log(chi)[:, None]
+    factor = np.asarray(model.factor(delta_f, chi), dtype=np.float64)[:, None]
+    rows_per_block = max(1, BLOCK_ELEMENTS // len(chi))
+    # precisión >= UMBRAL_PRECISION  <=>  |V_obs - V_pred| / V_obs <= 1 - UMBRAL_PRECISION / 100
+    max_relative = 1 - UMBRAL_PRECISION / 100
+
+    sums = {}
+    for name, (kind, obs, x) in _catalogs.items():
+        acc = np.zeros((5, len(chi)))  # n, suma |residuo| / |obs|, n_original, residuo, residuo²
+        for a, b in chunk_bounds(len(obs), rows_per_block):
+            o = obs[a:b]
+            if kind == 'velocity':
+                pred = factor * x[a:b]
+            else:
+                pred = delta_f[:, None] + log_chi * x[a:b]
+            res = np.subtract(o, pred, out=pred)
+            valid = np.isfinite(res)
+            all_valid = valid.all()
+            if all_valid:
+                acc[0] += res.shape[1]
+            else:
+                # Leyes no definidas en parte de la rejilla (p. ej. raíz de un negativo)
+                acc[0] += valid.sum(axis=1)
+                res[~valid] = 0.0
+            acc[3] += res.sum(axis=1)
+            acc[4] += np.einsum('ij,ij->i', res, res)
+            # |residuo| / |obs|: DELTA_F_LIGO puede ser negativo
+            relative = np.abs(res, out=res)
+            relative /= np.abs(o)
+            acc[1] += relative.sum(axis=1)
+            original = relative <= max_relative
+            if not all_valid:
+                original &= valid
+            acc[2] += np.count_nonzero(original, axis=1)
+        sums[name] = acc
+    return sums
+
+def _summarize(sums):
+    # Precisión media = (1 - media(|residuo| / |obs|)) * 100, como calculate_precision
+    n, relative, n_original, residual, residual2 = sums
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'PRECISION': (1 - relative / n) * 100,
+            'FRAC_ORIGINAL': n_original / n,
+            'RESIDUAL_MEAN': residual / n,
+            'RESIDUAL_RMS': np.sqrt(residual2 / n),
+        }
+
+def scan_grid(catalogs, chi_values, delta_f_values, model='power_law',
+              workers=1, grid_block=GRID_BLOCK):
+    """
+    Puntúa todos los pares (CHI, delta_F) de `chi_values` x `delta_f_values`.
+
+    `catalogs` es un dict {nombre: catálogo} con catálogos de
+    velocity_catalog, ligo_catalog o load_catalog. `model` (nombre o
+    MFSUModel) es la ley de velocidad de los catálogos 'velocity'. Con
+    `workers` > 1 (o None = todos los núcleos) los bloques de `grid_block`
+    puntos se reparten en un pool de procesos.
+
+    Devuelve un DataFrame con una fila por punto de rejilla (CHI varía más
+    lento): CHI, DELTA_F, las columnas <REGISTRO>_<ESTADÍSTICO> de STATS y
+    PRECISION_GLOBAL (precisión media ponderada por filas de todos los
+    registros). La forma de la rejilla (n_CHI, n_delta_F) queda en
+    `scan.attrs['grid_shape']`; ver score_surface para la superficie 2D.
+    """
+    chi_values = np.atleast_1d(np.asarray(chi_values, dtype=np.float64))
+    delta_f_values = np.atleast_1d(np.asarray(delta_f_values, dtype=np.float64))
+    if len(chi_values) == 0 or len(delta_f_values) == 0:
+        raise ValueError("La rejilla necesita al menos un valor de CHI y uno de delta_F")
+    chi_grid, delta_grid = np.meshgrid(chi_values, delta_f_values, indexing='ij')
+    chi_grid, delta_grid = chi_grid.ravel(), delta_grid.ravel()
+    tasks = [(chi_grid[a:b], delta_grid[a:b], model)
+             for a, b in chunk_bounds(len(chi_grid), grid_block)]
+
+    n_workers = workers or os.cpu_count() or 1
+    with span('scan.grid', items=len(chi_grid) * sum(len(c[1]) for c in catalogs.values())):
+        if n_workers == 1 or len(tasks) == 1:
+            previous = _catalogs
+            _init_worker(catalogs)
+            try:
+                blocks = [_scan_block(t) for t in tasks]
+            finally:
+                _init_worker(previous)
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                     initargs=(catalogs,)) as pool:
+                blocks = list(pool.map(_scan_block, tasks))
+
+    out = {'CHI': chi_grid, 'DELTA_F': delta_grid}
+    n_total = np.zeros(len(chi_grid))
+    relative_total = np.zeros(len(chi_grid))
+    for name in catalogs:
+        sums = np.concatenate([block[name] for block in blocks], axis=1)
+        for stat, values in _summarize(sums).items():
+            out[f'{name.upper()}_{stat}'] = values
+        n_total += sums[0]
+        relative_total += sums[1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['PRECISION_GLOBAL'] = (1 - relative_total / n_total) * 100
+    scan = pd.DataFrame(out)
+    scan.attrs['grid_shape'] = (len(chi_values), len(delta_f_values))
+    return scan
+
+def scan_registers(paths, chi_values, delta_f_values, model='power_law', workers=1,
+                   grid_block=GRID_BLOCK):
+    """
+    Igual que scan_grid, leyendo los catálogos de los registros en disco:
+    `paths` es un dict {tipo: ruta} con tipos de SCAN_COLUMNS, p. ej.
+    {'sparc': 'REGISTRO_MAESTRO_MFSU_175.csv', 'gaia': 'gaia_massive_events.csv'}.
+    """
+    catalogs = {kind: load_catalog(kind, path) for kind, path in paths.items()}
+    return scan_grid(catalogs, chi_values, delta_f_values, model, workers, grid_block)
+
+def score_surface(scan, column='PRECISION_GLOBAL'):
+    """
+    Superficie 2D (n_CHI, n_delta_F) de una columna de scan_grid, con los
+    ejes de CHI y delta_F: devuelve (chi_values, delta_f_values, superficie).
+    Usa la forma guardada en `scan.attrs['grid_shape']` (así admite valores
+    repetidos en la rejilla); sin ella (p. ej. un barrido leído de disco)
+    la deduce de los valores distintos de CHI y delta_F.
+    """
+    shape = scan.attrs.get('grid_shape')
+    if shape is None:
+        shape = (len(pd.unique(scan['CHI'].to_numpy())), len(pd.unique(scan['DELTA_F'].to_numpy())))
+    n_chi, n_delta = shape
+    if n_chi * n_delta != len(scan):
+        raise ValueError(f"El barrido tiene {len(scan)} filas, no una rejilla {n_chi} x {n_delta}")
+    chi_values = scan['CHI'].to_numpy()[::n_delta]
+    delta_values = scan['DELTA_F'].to_numpy()[:n_delta]
+    surface = scan[column].to_numpy().reshape(n_chi, n_delta)
+    return chi_values, delta_values, surface
+
+def best_point(scan, column='PRECISION_GLOBAL'):
+    """Fila de scan_grid con el mayor valor de `column` (como Series)."""
+    return scan.loc[scan[column].idxmax()]
@@ -0,0 +1,461 @@
+"""
+MFSU V2 - Servicio de predicción por micro-lotes
+Muchas peticiones concurrentes de una galaxia (o de unas pocas) se agrupan
+en lotes y cada lote se evalúa con una sola llamada a la API vectorizada de
+core.engine (predict_velocity_batch, extract_dna_batch...). Un lote se cierra
+cuando junta MAX_BATCH elementos o cuando la petición más antigua lleva
+MAX_DELAY segundos esperando; los resultados se reparten a cada petición.
+
+    service = PredictionService(max_batch=4096, max_delay=0.002)
+    async with service:
+        v = await service.call('predict_velocity', v_bar=120.0)
+        dna = await service.call('extract_dna', v_obs=[150.0, 90.0], v_bar=[120.0, 80.0])
+
+Contrapresión: cada cola admite como mucho MAX_PENDING elementos; por
+encima, `submit` espera turno en orden de llegada hasta que un lote libere
+sitio (y el servidor deja de leer de esa conexión). Las métricas (tamaño de
+lote, profundidad de cola, esperas por contrapresión y tiempo en cola) se
+acumulan en core.metrics y se exponen en /metrics con formato de Prometheus.
+
+Front end HTTP/1.1 mínimo (TCP o socket Unix, con keep-alive) para probarlo
+en local:
+
+    python -m core.service --port 8765
+    curl -d '{"v_bar": 120}' http://127.0.0.1:8765/predict_velocity
+
+    POST /<función>   cuerpo JSON con los argumentos (escalares o listas)
+    GET  /functions   funciones disponibles y sus argumentos
+    GET  /metrics     métricas (Prometheus)
+    GET  /health
+
+Los resultados son los de la API vectorizada (NumPy), que puede diferir de
+la ruta escalar `math` en el último bit.
+"""
+
+import json
+import asyncio
+from collections import deque
+import numpy as np
+from .constants import DELTA_F_ORIGINAL
+from .engine import (predict_velocity_batch, extract_dna_batch, calculate_precision_batch,
+                     apply_mfsu_transform)
+from .metrics import span, REGISTRY
+
+# Elementos por lote, ventana de espera (s) y elementos en cola por función
+MAX_BATCH = 4096
+MAX_DELAY = 0.002
+MAX_PENDING = 65536
+
+# Cubos del histograma de tamaños de lote
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+# Función servida -> (función vectorizada, argumentos, valores por defecto)
+BATCH_FUNCTIONS = {
+    'predict_velocity': (predict_velocity_batch, ('v_bar', 'delta_f'), {'delta_f': DELTA_F_ORIGINAL}),
+    'extract_dna': (extract_dna_batch, ('v_obs', 'v_bar'), {}),
+    'calculate_precision': (calculate_precision_batch, ('v_obs', 'v_pred'), {}),
+    'apply_mfsu_transform': (apply_mfsu_transform, ('v_bar', 'n'), {'n': 0}),
+}
+
+class MicroBatcher:
+    """
+    Cola de peticiones de una función vectorizada `func(*columnas)` que
+    devuelve un ndarray del mismo largo que las columnas. `submit` acepta
+    escalares (devuelve un float) o arrays 1D que se difunden entre sí
+    (devuelve un ndarray). Hay que arrancarla con `start()` dentro del bucle
+    de eventos y cerrarla con `close()`, que evalúa lo pendiente.
+    """
+
+    def __init__(self, func, name='batch', max_batch=MAX_BATCH, max_delay=MAX_DELAY,
+                 max_pending=MAX_PENDING, registry=None):
+        self.func = func
+        self.name = name
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max(max_pending, max_batch)
+        self.registry = registry or REGISTRY
+        self._requests = []  # (future, argumentos, n elementos o None si es escalar, t de llegada)
+        self._pending = 0
+        self._waiters = deque()  # (future, elementos) esperando sitio en la cola
+        self._reserved = 0       # elementos de esperas ya despertadas
+        self._timer = None
+        self._task = None
+        self._closing = False
+        self.stats = {
+            'requests': 0, 'items': 0, 'batches': 0, 'max_batch_size': 0,
+            'max_queue_depth': 0, 'backpressure_waits': 0, 'errors': 0,
+            'batch_size_buckets': [0] * (len(BATCH_SIZE_BUCKETS) + 1),
+        }
+
+    @property
+    def queue_depth(self):
+        """Elementos en cola pendientes de evaluar."""
+        return self._pending
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._ready = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+        return self
+
+    async def close(self):
+        """Evalúa las peticiones pendientes y detiene la cola."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._ready.set()
+        await self._task
+        self._task = None
+
+    async def submit(self, *args):
+        if self._task is None or self._closing:
+            raise RuntimeError(f"La cola '{self.name}' no está en marcha")
+        if all(np.ndim(a) == 0 for a in args):
+            n = None
+            args = tuple(float(a) for a in args)
+        else:
+            args = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in args))
+            if args[0].ndim != 1:
+                raise ValueError("Los argumentos deben ser escalares o listas 1D")
+            n = len(args[0])
+            if n == 0:
+                # Nada que encolar: el lote nunca se cerraría con 0 elementos
+                return np.empty(0)
+        size = 1 if n is None else n
+
+        # Contrapresión: con la cola llena se espera turno (en orden de llegada)
+        if self._waiters or (self._pending and self._pending + self._reserved + size > self.max_pending):
+            self.stats['backpressure_waits'] += 1
+            waiter = self._loop.create_future()
+            self._waiters.append((waiter, size))
+            try:
+                await waiter
+            finally:
+                # Cancelada antes de ser despertada: no tenía sitio reservado
+                if not waiter.cancelled():
+                    self._reserved -= size
+
+        future = self._loop.create_future()
+        self._requests.append((future, args, n, self._loop.time()))
+        self._pending += size
+        self.stats['requests'] += 1
+        if self._pending > self.stats['max_queue_depth']:
+            self.stats['max_queue_depth'] = self._pending
+        if self._pending >= self.max_batch:
+            self._ready.set()
+        elif self._timer is None:
+            self._timer = self._loop.call_later(self.max_delay, self._ready.set)
+        return await future
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            while self._pending:
+                self._flush()
+                # Cede el bucle entre lotes para que lleguen los resultados
+                await asyncio.sleep(0)
+                if self._pending < self.max_batch and not self._closing:
+                    # Lo que queda ya ha esperado un lote: ventana desde ahora
+                    if self._pending and self._timer is None:
+                        self._timer = self._loop.call_later(self.max_delay, self._ready.set)
+                    break
+            if self._closing and not self._pending:
+                return
+
+    def _take(self):
+        # Peticiones completas hasta llenar el lote (la última puede pasarse)
+        items = 0
+        for i, (_, _, n, _) in enumerate(self._requests):
+            items += 1 if n is None else n
+            if items >= self.max_batch:
+                break
+        batch, self._requests = self._requests[:i + 1], self._requests[i + 1:]
+        self._pending -= items
+        return batch, items
+
+    def _admit_waiters(self):
+        # Despierta, en orden, las esperas que caben en el sitio liberado
+        while self._waiters:
+            waiter, size = self._waiters[0]
+            used = self._pending + self._reserved
+            if used and used + size > self.max_pending:
+                break
+            self._waiters.popleft()
+            if not waiter.done():
+                self._reserved += size
+                waiter.set_result(None)
+
+    def _flush(self):
+        batch, items = self._take()
+        self._admit_waiters()
+        now = self._loop.time()
+        self.registry.record(f'service.{self.name}.queue_wait', now - batch[0][3], items=len(batch))
+
+        if all(n is None for _, _, n, _ in batch):
+            columns = [np.array([args[i] for _, args, _, _ in batch]) for i in range(len(batch[0][1]))]
+        else:
+            columns = [np.concatenate([np.atleast_1d(args[i]) for _, args, _, _ in batch])
+                       for i in range(len(batch[0][1]))]
+        try:
+            with span(f'service.{self.name}.batch', items=items, registry=self.registry):
+                out = np.asarray(self.func(*columns), dtype=np.float64)
+        except Exception as exc:
+            self.stats['errors'] += 1
+            for future, _, _, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        self._record_batch(items)
+        values = out.tolist()
+        start = 0
+        for future, _, n, _ in batch:
+            if n is None:
+                if not future.done():
+                    future.set_result(values[start])
+                start += 1
+            else:
+                if not future.done():
+                    future.set_result(out[start:start + n])
+                start += n
+
+    def _record_batch(self, items):
+        stats = self.stats
+        stats['batches'] += 1
+        stats['items'] += items
+        stats['max_batch_size'] = max(stats['max_batch_size'], items)
+        for i, bound in enumerate(BATCH_SIZE_BUCKETS):
+            if items <= bound:
+                stats['batch_size_buckets'][i] += 1
+                break
+        else:
+            stats['batch_size_buckets'][-1] += 1
+
+class PredictionService:
+    """
+    Una MicroBatcher por función de BATCH_FUNCTIONS. `call(nombre, **kwargs)`
+    (o con argumentos posicionales en el orden de BATCH_FUNCTIONS) completa
+    los argumentos por defecto y encola la petición.
+    """
+
+    def __init__(self, max_batch=MAX_BATCH, max_delay=MAX_DELAY, max_pending=MAX_PENDING,
+                 functions=None, registry=None):
+        self.functions = functions or BATCH_FUNCTIONS
+        self.registry = registry or REGISTRY
+        self.batchers = {
+            name: MicroBatcher(func, name, max_batch, max_delay, max_pending, self.registry)
+            for name, (func, _, _) in self.functions.items()
+        }
+
+    async def start(self):
+        for batcher in self.batchers.values():
+            batcher.start()
+        return self
+
+    async def close(self):
+        for batcher in self.batchers.values():
+            await batcher.close()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def signature(self, name):
+        """Argumentos (en orden) y valores por defecto de una función servida."""
+        if name not in self.functions:
+            raise KeyError(f"Función no servida: {name} (disponibles: {', '.join(self.functions)})")
+        _, arg_names, defaults = self.functions[name]
+        return arg_names, defaults
+
+    async def call(self, name, *args, **kwargs):
+        arg_names, defaults = self.signature(name)
+        values = dict(defaults)
+        values.update(zip(arg_names, args))
+        values.update(kwargs)
+        missing = [a for a in arg_names if a not in values]
+        unknown = set(values) - set(arg_names)
+        if missing or unknown:
+            raise ValueError(f"{name}: faltan {missing} / sobran {sorted(unknown)}")
+        return await self.batchers[name].submit(*(values[a] for a in arg_names))
+
+    def stats(self):
+        """Estadísticas por función, con la profundidad de cola actual."""
+        out = {}
+        for name, batcher in self.batchers.items():
+            stats = dict(batcher.stats, queue_depth=batcher.queue_depth)
+            stats['mean_batch_size'] = stats['items'] / stats['batches'] if stats['batches'] else None
+            stats['batch_size_buckets'] = dict(zip([str(b) for b in BATCH_SIZE_BUCKETS] + ['+Inf'],
+                                                   stats['batch_size_buckets']))
+            out[name] = stats
+        return out
+
+    def to_prometheus(self, prefix='mfsu'):
+        """Métricas de las colas seguidas de las etapas del registro de métricas."""
+        lines = []
+        gauges = (('queue_depth', 'gauge', 'Elementos en cola.'),
+                  ('max_queue_depth', 'gauge', 'Máxima profundidad de cola.'),
+                  ('requests', 'counter', 'Peticiones recibidas.'),
+                  ('items', 'counter', 'Elementos evaluados.'),
+                  ('batches', 'counter', 'Lotes evaluados.'),
+                  ('backpressure_waits', 'counter', 'Esperas por cola llena.'),
+                  ('errors', 'counter', 'Lotes con error.'))
+        for key, kind, text in gauges:
+            metric = f'{prefix}_service_{key}' + ('_total' if kind == 'counter' else '')
+            lines += [f'# HELP {metric} {text}', f'# TYPE {metric} {kind}']
+            for name, batcher in self.batchers.items():
+                value = batcher.queue_depth if key == 'queue_depth' else batcher.stats[key]
+                lines.append(f'{metric}{{function="{name}"}} {value}')
+
+        metric = f'{prefix}_service_batch_size'
+        lines += [f'# HELP {metric} Elementos por lote.', f'# TYPE {metric} histogram']
+        for name, batcher in self.batchers.items():
+            cumulative = 0
+            for bound, n in zip(BATCH_SIZE_BUCKETS, batcher.stats['batch_size_buckets']):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{function="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{function="{name}",le="+Inf"}} {batcher.stats["batches"]}')
+            lines.append(f'{metric}_sum{{function="{name}"}} {batcher.stats["items"]}')
+            lines.append(f'{metric}_count{{function="{name}"}} {batcher.stats["batches"]}')
+        return '\n'.join(lines) + '\n' + self.registry.to_prometheus(prefix)
+
+# --- Front end HTTP ---
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+# Tamaño máximo del cuerpo de una petición (bytes)
+MAX_BODY = 16 * 1024 * 1024
+
+def _response(status, body, content_type='application/json', keep_alive=True):
+    if not isinstance(body, bytes):
+        body = (body if isinstance(body, str) else json.dumps(body)).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+async def _dispatch(service, method, path, body):
+    """(estado, cuerpo, content-type) de una petición."""
+    path = path.split('?', 1)[0].strip('/')
+    if method == 'GET':
+        if path == 'health':
+            return 200, {'status': 'ok'}, 'application/json'
+        if path == 'metrics':
+            return 200, service.to_prometheus(), 'text/plain; version=0.0.4'
+        if path == 'stats':
+            return 200, service.stats(), 'application/json'
+        if path == 'functions':
+            return 200, {name: {'args': list(args), 'defaults': defaults}
+                         for name, (_, args, defaults) in service.functions.items()}, 'application/json'
+        return 404, {'error': f'Ruta desconocida: /{path}'}, 'application/json'
+    if method != 'POST':
+        return 405, {'error': f'Método no admitido: {method}'}, 'application/json'
+    if path not in service.functions:
+        return 404, {'error': f'Función no servida: {path}'}, 'application/json'
+    try:
+        kwargs = json.loads(body or b'{}')
+        if not isinstance(kwargs, dict):
+            raise ValueError("El cuerpo debe ser un objeto JSON")
+        result = await service.call(path, **kwargs)
+    except (ValueError, TypeError) as exc:
+        return 400, {'error': str(exc)}, 'application/json'
+    if isinstance(result, np.ndarray):
+        # NaN / inf no son JSON estándar: se devuelven como null
+        result = [v if np.isfinite(v) else None for v in result.tolist()]
+    elif not np.isfinite(result):
+        result = None
+    return 200, {'result': result}, 'application/json'
+
+async def _reject(writer, message, status=400):
+    """Responde con un error y cierra la conexión (la petición no se puede leer)."""
+    writer.write(_response(status, {'error': message}, keep_alive=False))
+    await writer.drain()
+
+def make_handler(service):
+    """Manejador de conexiones HTTP/1.1 (keep-alive) para asyncio.start_server."""
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    await _reject(writer, 'Línea de petición mal formada')
+                    break
+                method, path, version = parts
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                keep_alive = headers.get('connection', '').lower() != 'close' and 'HTTP/1.0' not in version
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await _reject(writer, 'Content-Length no válido')
+                    break
+                if length > MAX_BODY:
+                    await _reject(writer, 'Cuerpo demasiado grande', status=413)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    status, payload, content_type = await _dispatch(service, method.upper(), path, body)
+                except Exception as exc:
+                    status, payload, content_type = 500, {'error': repr(exc)}, 'application/json'
+                writer.write(_response(status, payload, content_type, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+async def serve(service, host='127.0.0.1', port=8765, unix_path=None):
+    """Arranca el servicio y su servidor HTTP (TCP o socket Unix) y lo devuelve."""
+    await service.start()
+    handler = make_handler(service)
+    if unix_path:
+        return await asyncio.start_unix_server(handler, path=unix_path)
+    return await asyncio.start_server(handler, host, port)
+
+async def _main(args):
+    service = PredictionService(args.max_batch, args.max_delay_ms / 1000, args.max_pending)
+    server = await serve(service, args.host, args.port, args.unix)
+    where = args.unix or f"http://{args.host}:{args.port}"
+    print(f"🚀 Servicio MFSU escuchando en {where} (lotes de {args.max_batch}, {args.max_delay_ms} ms)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Servicio de predicción MFSU por micro-lotes")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help="Ruta de un socket Unix (en lugar de TCP)")
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--max-delay-ms', type=float, default=MAX_DELAY * 1000)
+    parser.add_argument('--max-pending', type=int, default=MAX_PENDING)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,74 @@
+"""
+MFSU V2 - Lector SPARC
+Lectura directa de las curvas de rotación `_rotmod` de SPARC a arrays NumPy.
+"""
+
+import os
+import numpy as np
+
+# Columnas de un archivo _rotmod (las dos de brillo superficial se descartan)
+SPARC_COLUMNS = ('radius', 'v_obs', 'err_v', 'v_gas', 'v_disk', 'v_bul')
+HEADER_LINES = 3
+# Bytes leídos desde el final del archivo en modo `tail_only`
+TAIL_BLOCK = 4096
+
+def _parse_rows(lines):
+    """
+    Convierte líneas de datos en una matriz (n_filas, 6).
+    Ruta rápida: un único split + conversión en bloque cuando todas las filas
+    tienen el mismo número de columnas. Las filas incompletas se rellenan con NaN.
+    """
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        raise ValueError("El archivo no contiene filas de datos")
+
+    n_cols = len(lines[0].split())
+    tokens = b' '.join(lines).split()
+    if len(tokens) == n_cols * len(lines):
+        table = np.array(tokens, dtype=np.float64).reshape(len(lines), n_cols)
+    else:
+        n_cols = max(len(line.split()) for line in lines)
+        table = np.full((len(lines), n_cols), np.nan)
+        for i, line in enumerate(lines):
+            row = line.split()
+            table[i, :len(row)] = np.array(row, dtype=np.float64)
+
+    if table.shape[1] < 5:
+        raise ValueError(f"Formato SPARC inválido: {table.shape[1]} columnas")
+    if table.shape[1] < len(SPARC_COLUMNS):
+        table = np.pad(table, ((0, 0), (0, len(SPARC_COLUMNS) - table.shape[1])),
+                       constant_values=np.nan)
+    return table[:, :len(SPARC_COLUMNS)]
+
+def _tail_lines(f, size):
+    """Devuelve la última línea de datos leyendo sólo el bloque final del archivo."""
+    start = max(0, size - TAIL_BLOCK)
+    f.seek(start)
+    lines = f.read().splitlines()
+    if start == 0:
+        lines = lines[HEADER_LINES:]
+    else:
+        lines = lines[1:]  # la primera línea del bloque puede estar cortada
+    lines = [line for line in lines if line.strip()]
+    return lines[-1:]
+
+def read_rotmod(path, tail_only=False):
+    """
+    Lee una curva de rotación SPARC (mismo formato que
+    `pd.read_csv(path, sep=r'\\s+', skiprows=3, header=None)`).
+
+    Devuelve un dict {columna: ndarray float64} con las columnas de
+    SPARC_COLUMNS. Con `tail_only=True` sólo se lee y devuelve la última fila.
+    """
+    with open(path, 'rb') as f:
+        if tail_only:
+            lines = _tail_lines(f, os.fstat(f.fileno()).st_size)
+        else:
+            lines = f.read().splitlines()[HEADER_LINES:]
+    table = _parse_rows(lines)
+    return {name: table[:, i] for i, name in enumerate(SPARC_COLUMNS)}
+
+def baryonic_velocity(curve):
+    """V_bar = sqrt(V_gas² + V_disk² + V_bul²), con el bulbo ausente tratado como 0."""
+    v_bul = np.where(np.isnan(curve['v_bul']), 0.0, curve['v_bul'])
+    return np.sqrt(curve['v_gas']**2 + curve['v_disk']**2 + v_bul**2)
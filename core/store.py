@@ -0,0 +1,352 @@
+"""
+MFSU V2 - Almacén de registros
+Carga los Registros Maestros (SPARC, JWST, LIGO, Gaia, cruce Fermi-Gaia)
+una sola vez en columnas compactas y responde consultas de rango, igualdad
+y top-k sin releer ni recorrer el archivo.
+
+  * Columnas: categóricas para STATUS / BRANCH_STATUS / TIPO_COLAPSO...
+    (según el esquema de core.registers), float32 cuando el redondeo del
+    registro (2-6 decimales) se recupera exactamente, enteros de 32 bits
+    cuando caben. Los resultados se devuelven con los valores originales.
+  * Índices ordenados (SortedIndex) sobre delta_F, redshift, radio y
+    precisión: un rango son dos búsquedas binarias y un top-k un corte,
+    O(log n + k). Las categóricas tienen un índice por categoría.
+
+    store = RegisterStore()
+    store.load('sparc', 'REGISTRO_MAESTRO_MFSU_175.csv')
+    store.query('sparc', {'ESTADO': 'ORIGINAL', 'DELTA_F_REAL': (0.91, 0.93)})
+    store.top('jwst', 'REDSHIFT_Z', 10)
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from .registers import read_register
+from .metrics import span
+
+# Columnas indexadas por defecto (las que existan en cada registro)
+INDEX_COLUMNS = (
+    'DELTA_F_DNA', 'DELTA_F_REAL', 'DELTA_F_LIGO', 'delta_F_calculado', 'delta_F_red',
+    'delta_F_local', 'REDSHIFT_Z', 'radius_kpc', 'distancia_recorrida_kpc',
+    'PRECISION_%', 'PRECISION_VS_TARGET',
+)
+
+# Decimales máximos para guardar una columna en float32
+MAX_FLOAT32_DECIMALS = 6
+
+class SortedIndex:
+    """
+    Claves ordenadas y la fila de cada una (orden estable: ante empates, la
+    fila que aparece primero). Las claves NaN no se indexan.
+
+    Con `decimals` las claves son la columna float32 compacta: el valor
+    original es round(clave, decimals) y, como el redondeo a float32 es
+    monótono, sólo el grupo de claves igual al float32 de un extremo de la
+    consulta necesita comprobarse con su valor original.
+    """
+
+    def __init__(self, keys, decimals=None):
+        keys = np.asarray(keys)
+        if decimals is None:
+            keys = keys.astype(np.float64, copy=False)
+        valid = np.flatnonzero(~np.isnan(keys))
+        order = np.argsort(keys[valid], kind='stable')
+        dtype = np.int32 if len(keys) < 2**31 else np.int64
+        self.rows = valid[order].astype(dtype)
+        self.sorted_keys = keys[valid][order]
+        self.decimals = decimals
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _search(self, value, inclusive, lower):
+        """Primera posición con clave > value (o >= value) según el extremo."""
+        keys = self.sorted_keys
+        # Extremo inferior inclusivo o superior exclusivo: primera clave >= value
+        side = 'left' if inclusive == lower else 'right'
+        if self.decimals is None:
+            return int(np.searchsorted(keys, value, side=side))
+        key = keys.dtype.type(value)
+        a, b = np.searchsorted(keys, key, side='left'), np.searchsorted(keys, key, side='right')
+        if a == b:
+            return int(a)
+        original = np.round(np.float64(keys[a]), self.decimals)
+        inside = original >= value if side == 'left' else original > value
+        return int(a if inside else b)
+
+    def bounds(self, lo=None, hi=None, closed='both'):
+        """Posiciones [a, b) en el índice de las claves dentro del rango."""
+        a = 0 if lo is None else self._search(lo, closed in ('both', 'left'), lower=True)
+        b = len(self.rows) if hi is None else self._search(hi, closed in ('both', 'right'), lower=False)
+        return a, max(a, b)
+
+    def range(self, lo=None, hi=None, closed='both'):
+        """Filas con lo <= clave <= hi (`closed`: 'both', 'left', 'right' o 'neither'), por clave."""
+        a, b = self.bounds(lo, hi, closed)
+        return self.rows[a:b]
+
+    def top(self, k, largest=True):
+        """
+        Filas de las k claves mayores (o menores), de la mejor a la peor.
+        Ante empates, la fila que aparece primero (como la ordenación estable
+        de query con `where`).
+        """
+        n = len(self.rows)
+        k = max(0, min(k, n))
+        if not largest or k == 0:
+            return self.rows[:k]
+        # Cola del índice desde el inicio del grupo de empates del corte,
+        # ordenada de forma estable por clave descendente: O(k log k)
+        keys = self.sorted_keys
+        start = int(np.searchsorted(keys, keys[n - k], side='left'))
+        order = np.argsort(-keys[start:], kind='stable')[:k]
+        return self.rows[start:][order]
+
+class CategoryIndex:
+    """Filas de cada categoría, agrupadas por código (una rebanada por categoría)."""
+
+    def __init__(self, categorical):
+        codes = np.asarray(categorical.codes)
+        self.categories = list(categorical.categories)
+        order = np.argsort(codes, kind='stable')
+        dtype = np.int32 if len(codes) < 2**31 else np.int64
+        self.rows = order.astype(dtype)
+        # Código -1 (NaN) queda al principio; offsets[c] .. offsets[c + 1] es la categoría c
+        counts = np.bincount(codes + 1, minlength=len(self.categories) + 1)
+        self.offsets = np.cumsum(counts)
+
+    def rows_for(self, value):
+        try:
+            c = self.categories.index(value)
+        except ValueError:
+            return self.rows[:0]
+        return self.rows[self.offsets[c]:self.offsets[c + 1]]
+
+    def count(self, value):
+        return len(self.rows_for(value))
+
+def _compact_float(values):
+    """
+    float32 y número de decimales si el redondeo de la columna se recupera
+    exactamente desde float32; si no, la columna float64 y None.
+    """
+    finite = values[np.isfinite(values)]
+    for decimals in range(MAX_FLOAT32_DECIMALS + 1):
+        if np.array_equal(np.round(finite, decimals), finite):
+            break
+    else:
+        return values, None
+    compact = values.astype(np.float32)
+    restored = np.round(compact[np.isfinite(values)].astype(np.float64), decimals)
+    if np.array_equal(restored, finite):
+        return compact, decimals
+    return values, None
+
+class _Register:
+    """Columnas compactas e índices de un registro cargado."""
+
+    def __init__(self, path, index=None):
+        self.path = path
+        self.mtime_ns = _mtime_ns(path)
+        frame = read_register(path, mmap=False)
+        self.n_rows = len(frame)
+        self.columns = {}
+        self.decimals = {}
+        self.int_dtypes = {}
+        for name in frame.columns:
+            column = frame[name]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                self.columns[name] = column.array
+            elif column.dtype.kind == 'f':
+                values, decimals = _compact_float(column.to_numpy(np.float64))
+                self.columns[name] = values
+                if decimals is not None:
+                    self.decimals[name] = decimals
+            elif column.dtype.kind in 'iu':
+                values = column.to_numpy()
+                small = len(values) == 0 or (values.min() >= np.iinfo(np.int32).min
+                                             and values.max() <= np.iinfo(np.int32).max)
+                if small and values.dtype.itemsize > 4:
+                    self.int_dtypes[name] = values.dtype
+                    values = values.astype(np.int32)
+                self.columns[name] = values
+            else:
+                # Texto: el almacenamiento de cadenas de pandas (Arrow si está disponible)
+                self.columns[name] = column.array
+
+        wanted = INDEX_COLUMNS if index is None else index
+        self.indexes = {name: SortedIndex(self.columns[name], self.decimals.get(name)) for name in wanted
+                        if name in self.columns and self.columns[name].dtype.kind in 'fiu'}
+        self.category_indexes = {name: CategoryIndex(col) for name, col in self.columns.items()
+                                 if isinstance(col, pd.Categorical)}
+
+    def values(self, name, rows=None):
+        """Valores originales de una columna (todas las filas o `rows`)."""
+        column = self.columns[name]
+        values = column if rows is None else column[rows]
+        if name in self.decimals:
+            return np.round(np.asarray(values, dtype=np.float64), self.decimals[name])
+        if name in self.int_dtypes:
+            return values.astype(self.int_dtypes[name])
+        return values
+
+    def nbytes(self):
+        total = 0
+        for column in self.columns.values():
+            total += column.nbytes
+        for index in self.indexes.values():
+            total += index.rows.nbytes + index.sorted_keys.nbytes
+        return total
+
+def _mtime_ns(path):
+    if os.path.isdir(path):
+        return max(os.stat(os.path.join(path, f)).st_mtime_ns for f in os.listdir(path))
+    return os.stat(path).st_mtime_ns
+
+class RegisterStore:
+    """
+    Registros cargados por nombre ('sparc', 'jwst'...). Las consultas
+    devuelven posiciones de fila (ndarray) o, con query / frame, un
+    DataFrame con los valores originales indexado por la fila del registro.
+    """
+
+    def __init__(self):
+        self._registers = {}
+
+    def load(self, name, path, index=None):
+        """
+        Carga (o recarga) el registro de `path` (CSV, Parquet o .npcol) con
+        el nombre `name`. `index` sustituye a INDEX_COLUMNS para este registro.
+        """
+        with span('store.load') as s:
+            self._registers[name] = _Register(path, index)
+            s.items = self._registers[name].n_rows
+        return self
+
+    def refresh(self):
+        """Recarga los registros cuyo archivo ha cambiado desde la carga. Devuelve sus nombres."""
+        changed = [name for name, reg in self._registers.items()
+                   if _mtime_ns(reg.path) != reg.mtime_ns]
+        for name in changed:
+            reg = self._registers[name]
+            self.load(name, reg.path, list(reg.indexes))
+        return changed
+
+    def __contains__(self, name):
+        return name in self._registers
+
+    def names(self):
+        return list(self._registers)
+
+    def columns(self, name):
+        return list(self._registers[name].columns)
+
+    def indexed(self, name):
+        """Columnas con índice ordenado o de categorías."""
+        reg = self._registers[name]
+        return list(reg.indexes) + list(reg.category_indexes)
+
+    def nbytes(self, name):
+        """Memoria de las columnas e índices del registro."""
+        return self._registers[name].nbytes()
+
+    def __len__(self):
+        return len(self._registers)
+
+    def _register(self, name):
+        try:
+            return self._registers[name]
+        except KeyError:
+            raise KeyError(f"Registro no cargado: {name}") from None
+
+    def _index(self, reg, column):
+        index = reg.indexes.get(column)
+        if index is None:
+            raise KeyError(f"Columna sin índice ordenado: {column}")
+        return index
+
+    def range(self, name, column, lo=None, hi=None, closed='both'):
+        """Filas con `column` en [lo, hi] (extremos según `closed`), ordenadas por `column`."""
+        return self._index(self._register(name), column).range(lo, hi, closed)
+
+    def top(self, name, column, k, largest=True):
+        """Filas de los k mayores (o menores) valores de `column`."""
+        return self._index(self._register(name), column).top(k, largest)
+
+    def equals(self, name, column, value):
+        """Filas cuya categoría `column` es `value`."""
+        reg = self._register(name)
+        index = reg.category_indexes.get(column)
+        if index is None:
+            raise KeyError(f"Columna sin índice de categorías: {column}")
+        return index.rows_for(value)
+
+    def frame(self, name, rows=None, columns=None):
+        """DataFrame con los valores originales de las filas `rows` (todas por defecto)."""
+        reg = self._register(name)
+        columns = list(reg.columns) if columns is None else columns
+        data = {c: reg.values(c, rows) for c in columns}
+        index = np.arange(reg.n_rows) if rows is None else np.asarray(rows)
+        return pd.DataFrame(data, index=index)
+
+    def query(self, name, where=None, columns=None, order_by=None, k=None, largest=True):
+        """
+        Consulta combinada. `where` es un dict {columna: condición} donde la
+        condición es un valor (igualdad, categóricas) o una tupla (lo, hi)
+        con None como extremo abierto (rango cerrado).
+
+        Las filas candidatas salen del filtro indexado más selectivo (cada
+        recuento cuesta O(log n)); el resto de condiciones se comprueban sólo
+        sobre esas filas. Con `order_by` (columna indexada) y sin `where`, el
+        top-k es un corte del índice. Devuelve un DataFrame (ver `frame`).
+        """
+        reg = self._register(name)
+        where = dict(where or {})
+
+        if not where and order_by is not None:
+            index = self._index(reg, order_by)
+            rows = index.top(len(index) if k is None else k, largest)
+            return self.frame(name, rows, columns)
+
+        # Filtro de partida: el indexado con menos filas
+        best = None
+        for column, condition in where.items():
+            if isinstance(condition, tuple) and column in reg.indexes:
+                a, b = reg.indexes[column].bounds(*condition)
+                size = b - a
+            elif not isinstance(condition, tuple) and column in reg.category_indexes:
+                size = reg.category_indexes[column].count(condition)
+            else:
+                continue
+            if best is None or size < best[1]:
+                best = (column, size)
+
+        if best is None:
+            rows = np.arange(reg.n_rows)
+        else:
+            column = best[0]
+            condition = where.pop(column)
+            rows = (self.range(name, column, *condition) if isinstance(condition, tuple)
+                    else self.equals(name, column, condition))
+            rows = np.sort(rows)
+
+        for column, condition in where.items():
+            values = reg.values(column, rows)
+            if isinstance(condition, tuple):
+                lo, hi = condition
+                keep = np.ones(len(rows), dtype=bool)
+                if lo is not None:
+                    keep &= values >= lo
+                if hi is not None:
+                    keep &= values <= hi
+            else:
+                keep = np.asarray(values == condition)
+            rows = rows[keep]
+
+        if order_by is not None:
+            values = np.asarray(reg.values(order_by, rows), dtype=np.float64)
+            order = np.argsort(-values if largest else values, kind='stable')
+            rows = rows[order[:k] if k is not None else order]
+        elif k is not None:
+            rows = rows[:k]
+        return self.frame(name, rows, columns)
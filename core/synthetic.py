@@ -0,0 +1,103 @@
+"""
+MFSU V2 - Catálogos sintéticos
+Piezas comunes a los generadores vectorizados (JWST, LIGO): un flujo de
+números aleatorios independiente por bloque y escritura del catálogo por
+bloques a CSV o Parquet, en serie o con un pool de procesos.
+
+Un generador es una función `generate(n, rng, inicio=0, total=None)` que
+devuelve un dict {columna: array} con las filas inicio..inicio+n de un
+catálogo de `total` filas.
+"""
+
+import os
+from collections import deque
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+def chunk_bounds(n, chunk_size):
+    """Pares (inicio, fin) que cubren n filas en bloques de chunk_size."""
+    starts = range(0, n, chunk_size)
+    return [(s, min(s + chunk_size, n)) for s in starts]
+
+def chunk_seeds(seed, n_chunks):
+    """
+    Una SeedSequence por bloque, derivadas de `seed` con spawn(). El bloque k
+    recibe siempre la misma semilla, así que el catálogo es idéntico con
+    cualquier número de procesos (para un mismo chunk_size).
+    """
+    return np.random.SeedSequence(seed).spawn(n_chunks)
+
+def _generate_chunk(task):
+    """
+    Genera un bloque y lo deja codificado para `CatalogWriter` (en el worker).
+    Devuelve (n_filas, bloque).
+    """
+    generate, start, stop, total, seed_seq, fmt = task
+    columns = generate(stop - start, np.random.default_rng(seed_seq), inicio=start, total=total)
+    if fmt == 'parquet':
+        import pyarrow as pa
+        return stop - start, pa.table(columns)
+    return stop - start, pd.DataFrame(columns).to_csv(index=False, header=start == 0)
+
+class CatalogWriter:
+    """
+    Escribe en orden los bloques ya codificados por `_generate_chunk`:
+    texto CSV o tablas de Arrow si la ruta termina en .parquet.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = 'parquet' if path.lower().endswith('.parquet') else 'csv'
+        self._writer = None
+        self.n_rows = 0
+
+    def write(self, n_rows, block):
+        if self.format == 'parquet':
+            if self._writer is None:
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.path, block.schema)
+            self._writer.write_table(block)
+        else:
+            if self._writer is None:
+                self._writer = open(self.path, 'w', newline='', encoding='utf-8')
+            self._writer.write(block)
+        self.n_rows += n_rows
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+def write_catalog(path, generate, n, seed=None, chunk_size=1_000_000, workers=1):
+    """
+    Genera un catálogo de n filas por bloques y lo escribe en `path` en orden.
+
+    Con `workers` > 1 (o None = todos los núcleos) los bloques se generan en
+    un pool de procesos, que también los codifica (texto CSV o tabla de
+    Arrow); sólo hay en memoria unos pocos bloques a la vez.
+    Devuelve el número de filas escritas.
+    """
+    writer = CatalogWriter(path)
+    # Con n = 0, un bloque vacío: el archivo queda con la cabecera (CSV) o el esquema (Parquet)
+    bounds = chunk_bounds(n, chunk_size) or [(0, 0)]
+    tasks = [(generate, start, stop, n, s, writer.format)
+             for (start, stop), s in zip(bounds, chunk_seeds(seed, len(bounds)))]
+    n_workers = workers or os.cpu_count() or 1
+
+    try:
+        if n_workers == 1:
+            for task in tasks:
+                writer.write(*_generate_chunk(task))
+        else:
+            # Ventana acotada de bloques en vuelo: la escritura marca el ritmo
+            window = 2 * n_workers
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                pending = deque(pool.submit(_generate_chunk, t) for t in tasks[:window])
+                for task in tasks[window:]:
+                    writer.write(*pending.popleft().result())
+                    pending.append(pool.submit(_generate_chunk, task))
+                while pending:
+                    writer.write(*pending.popleft().result())
+    finally:
+        writer.close()
+    return writer.n_rows
@@ -0,0 +1,179 @@
+"""
+MFSU V2 - Motor de incertidumbre
+Monte Carlo y bootstrap para delta_F con intervalos de confianza por objeto.
+
+Las realizaciones se generan como arrays (n_realizaciones, n_objetos) y
+nunca con bucles de Python por realización. Los objetos se reparten en
+bloques; cada bloque recibe su propio flujo aleatorio (SeedSequence.spawn,
+como en core.synthetic) y se procesa entero en un worker, así que:
+
+  * el resultado es idéntico con cualquier número de procesos (para un
+    mismo `block_size`), y
+  * el coste escala linealmente con los núcleos: los bloques son
+    independientes y sólo vuelve el resumen de cada uno.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from .engine import extract_dna_batch
+from .fitting import NO_CURVES, fit_delta_f, segment_ids, load_sparc_curves
+from .processor import iter_sparc_files
+from .synthetic import chunk_bounds, chunk_seeds
+
+DEFAULT_LEVEL = 0.95
+
+# Tamaño objetivo de cada bloque en elementos (n_realizaciones x n_objetos)
+BLOCK_ELEMENTS = 2_000_000
+
+def summarize(samples, level=DEFAULT_LEVEL):
+    """
+    Resumen por objeto de una matriz de realizaciones (n_realizaciones, n_objetos).
+    Las realizaciones NaN (p. ej. velocidades no físicas) se ignoran.
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    valid = np.isfinite(samples)
+    n_valid = valid.sum(axis=0)
+    tail = (1 - level) / 2
+    out = {
+        'mean': np.full(samples.shape[1], np.nan),
+        'std': np.full(samples.shape[1], np.nan),
+        'ci_low': np.full(samples.shape[1], np.nan),
+        'ci_high': np.full(samples.shape[1], np.nan),
+        'n_valid': n_valid,
+    }
+    cols = n_valid > 0
+    if cols.any():
+        s = np.where(valid, samples, np.nan)[:, cols]
+        out['mean'][cols] = np.nanmean(s, axis=0)
+        out['std'][cols] = np.nanstd(s, axis=0, ddof=1) if len(samples) > 1 else np.nan
+        out['ci_low'][cols], out['ci_high'][cols] = np.nanquantile(s, [tail, 1 - tail], axis=0)
+    return out
+
+def _block_size(n_realizations, block_size):
+    return block_size or max(1, BLOCK_ELEMENTS // max(1, n_realizations))
+
+def _run_blocks(worker, tasks, workers):
+    """
+    Ejecuta los bloques (en un pool si workers != 1) y une los resúmenes en orden.
+    Sin bloques (catálogo vacío) devuelve un resumen vacío con las mismas columnas.
+    """
+    if not tasks:
+        return summarize(np.empty((0, 0)))
+    n_workers = workers or os.cpu_count() or 1
+    if n_workers == 1 or len(tasks) == 1:
+        results = [worker(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(worker, tasks))
+    return {k: np.concatenate([r[k] for r in results]) for k in results[0]}
+
+def _propagate_block(task):
+    func, values, errors, n_realizations, level, seed_seq = task
+    rng = np.random.default_rng(seed_seq)
+    draws = [v + e * rng.standard_normal((n_realizations, len(v))) for v, e in zip(values, errors)]
+    return summarize(func(*draws), level)
+
+def propagate(func, values, errors, n_realizations=1000, level=DEFAULT_LEVEL,
+              seed=None, block_size=None, workers=1):
+    """
+    Propagación Monte Carlo de errores gaussianos a través de `func`.
+
+    `values` y `errors` son secuencias paralelas de arrays (un array por
+    argumento de `func`, una entrada por objeto); un error puede ser un
+    escalar o None (sin perturbación). `func` debe ser vectorizada y de
+    nivel de módulo para poder enviarse a los workers.
+
+    Devuelve un DataFrame por objeto con 'estimate' (func sobre los valores
+    nominales), 'mean', 'std', 'ci_low', 'ci_high' y 'n_valid'.
+    """
+    values = [np.asarray(v, dtype=np.float64) for v in values]
+    n = len(values[0])
+    errors = [np.broadcast_to(np.asarray(0.0 if e is None else e, dtype=np.float64), (n,))
+              for e in errors]
+
+    bounds = chunk_bounds(n, _block_size(n_realizations, block_size))
+    tasks = [(func, [v[a:b] for v in values], [e[a:b] for e in errors], n_realizations, level, s)
+             for (a, b), s in zip(bounds, chunk_seeds(seed, len(bounds)))]
+    out = _run_blocks(_propagate_block, tasks, workers)
+    out = {'estimate': np.asarray(func(*values), dtype=np.float64), **out}
+    return pd.DataFrame(out)
+
+def delta_f_or_nan(v_obs, v_bar):
+    """extract_dna_batch, pero NaN (realización descartada) donde V_bar <= 0."""
+    v_bar = np.asarray(v_bar, dtype=np.float64)
+    return np.where(v_bar > 0, extract_dna_batch(v_obs, v_bar), np.nan)
+
+def delta_f_velocity_mc(v_obs, v_bar, err_obs=None, err_bar=None, n_realizations=1000,
+                        level=DEFAULT_LEVEL, seed=None, block_size=None, workers=1):
+    """
+    Intervalo de confianza de delta_F = 1 - ln(V_obs / V_bar) / ln(CHI) por
+    objeto perturbando V_obs y V_bar con sus errores (SPARC, GAIA, JWST...).
+    """
+    return propagate(delta_f_or_nan, (v_obs, v_bar), (err_obs, err_bar),
+                     n_realizations, level, seed, block_size, workers)
+
+def _bootstrap_block(task):
+    offsets, v_obs, v_bar, err_v, n_realizations, level, seed_seq = task
+    rng = np.random.default_rng(seed_seq)
+    n_gal = len(offsets) - 1
+    lengths = np.diff(offsets)
+    ids = segment_ids(offsets)
+
+    # Remuestreo con reemplazo dentro de cada curva, todas las realizaciones a la vez:
+    # la realización r de la galaxia g es el segmento r * n_gal + g
+    idx = offsets[ids] + np.floor(rng.random((n_realizations, len(ids))) * lengths[ids]).astype(np.int64)
+    idx = idx.ravel()
+    big_offsets = np.concatenate([[0], np.tile(lengths, n_realizations).cumsum()])
+    fit = fit_delta_f(big_offsets, v_obs[idx], v_bar[idx], None if err_v is None else err_v[idx])
+    return summarize(fit['delta_f'].reshape(n_realizations, n_gal), level)
+
+def bootstrap_curves(offsets, v_obs, v_bar, err_v=None, n_realizations=1000,
+                     level=DEFAULT_LEVEL, seed=None, block_size=None, workers=1):
+    """
+    Bootstrap de puntos de curva para el ajuste de curva completa
+    (core.fitting.fit_delta_f): cada realización remuestrea con reemplazo
+    los radios de cada galaxia y reajusta delta_F.
+
+    Devuelve un DataFrame por galaxia con 'estimate' (ajuste nominal),
+    'mean', 'std', 'ci_low', 'ci_high' y 'n_valid'.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    v_obs = np.asarray(v_obs, dtype=np.float64)
+    v_bar = np.asarray(v_bar, dtype=np.float64)
+    err_v = None if err_v is None else np.asarray(err_v, dtype=np.float64)
+    n_gal = len(offsets) - 1
+
+    # Bloques de galaxias de ~BLOCK_ELEMENTS puntos remuestreados
+    mean_points = max(1, offsets[-1] // max(1, n_gal))
+    bounds = chunk_bounds(n_gal, block_size or max(1, BLOCK_ELEMENTS // (n_realizations * mean_points)))
+    tasks = []
+    for (a, b), s in zip(bounds, chunk_seeds(seed, len(bounds))):
+        p0, p1 = offsets[a], offsets[b]
+        tasks.append((offsets[a:b + 1] - p0, v_obs[p0:p1], v_bar[p0:p1],
+                      None if err_v is None else err_v[p0:p1], n_realizations, level, s))
+    out = _run_blocks(_bootstrap_block, tasks, workers)
+    out = {'estimate': fit_delta_f(offsets, v_obs, v_bar, err_v)['delta_f'], **out}
+    return pd.DataFrame(out)
+
+def bootstrap_sparc_directory(directory_path, n_realizations=1000, level=DEFAULT_LEVEL,
+                              seed=None, workers=None, return_failures=False):
+    """
+    Bootstrap de curva completa para todo un directorio SPARC.
+    Devuelve una fila por galaxia con el delta_F ajustado y su intervalo.
+    Con `return_failures=True` devuelve también los archivos descartados.
+    """
+    if not os.path.exists(directory_path):
+        raise FileNotFoundError(f"No se encontró la carpeta: {directory_path}")
+
+    names, offsets, flat, failures = load_sparc_curves(iter_sparc_files(directory_path),
+                                                       return_failures=True)
+    if not names and not return_failures:
+        raise ValueError(NO_CURVES)
+    out = bootstrap_curves(offsets, flat['v_obs'], flat['v_bar'], flat['err_v'],
+                           n_realizations, level, seed, workers=workers)
+    out.insert(0, 'GALAXY', names)
+    if return_failures:
+        return out, failures
+    return out
@@ -1,40 +1,30 @@
-import numpy as np
-import math
+import os
+import sys
 
-# --- CONSTANTES DEL MODELO MFSU ---
-CHI = 12.65          # Impedancia Topológica (Newton-Gregory / Rugosidad)
-DELTA_F_BASE = 0.921 # Tallo Primordial (Semilla)
-SIGMA = 0.02         # Fluctuación de Franco (Vibración del contenedor)
+# Registro de modelos compartido (raíz del repositorio).
+# La ruta sólo se añade al ejecutar el archivo como script; al
+# importarlo como módulo, core ya debe ser importable.
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from core.models import SQRT_IMPEDANCE, branch_delta_f
 
 def calcular_velocidad_mfsu(v_bar, tipo_galaxia="tallo"):
     """
     Calcula la velocidad predicha usando la Ecuación Maestra Dinámica.
     V_pred = V_bar * sqrt(1 + CHI * (1 - delta_F))
+
+    `v_bar` y `tipo_galaxia` pueden ser también arrays (un catálogo entero).
     """
     
     # 1. Determinar el Nivel de Ramificación (delta_F)
     # En el modelo completo, esto depende de los parámetros beta, alpha, gamma.
-    # Aquí simplificamos seleccionando el "escalón" del fractal.
-    
-    if tipo_galaxia == "tallo":
-        # Galaxias masivas estables (N=0)
-        delta_f = DELTA_F_BASE  # 0.921
-    elif tipo_galaxia == "rama_1":
-        # Galaxias espirales típicas o corrientes estelares (N=1)
-        # Aproximación: delta_f decae por la dimensión fractal
-        delta_f = 0.548 
-    elif tipo_galaxia == "rama_2":
-        # Galaxias enanas o LSB (Low Surface Brightness) (N=2)
-        # Aquí la impedancia domina, delta_f es bajo.
-        delta_f = 0.315
-    else:
-        # Por defecto, usamos el Tallo
-        delta_f = DELTA_F_BASE
+    # Aquí simplificamos seleccionando el "escalón" del fractal
+    # (tabla de ramas de core.models; los tipos desconocidos usan el Tallo).
+    delta_f = branch_delta_f(tipo_galaxia)
 
     # 2. Aplicar la Ecuación Maestra (La fórmula del Libro)
     # Factor de Amplificación = Raíz Cuadrada de la Impedancia efectiva
-    impedancia_efectiva = 1 + CHI * (1 - delta_f)
-    factor_amplificacion = math.sqrt(impedancia_efectiva)
+    factor_amplificacion = SQRT_IMPEDANCE.factor(delta_f)
     
     # 3. Velocidad Final
     v_pred = v_bar * factor_amplificacion
@@ -65,8 +55,7 @@ v_obs_real_enana = 118.5  # Supongamos que Gaia/SPARC ve esto para la Enana C
 v_bar_enana = 50.0
 
 # Fórmula inversa del Cap 3: delta_F = 1 - [((V_obs/V_bar)^2 - 1) / CHI]
-ratio_sq = (v_obs_real_enana / v_bar_enana)**2
-delta_f_calculado = 1 - ((ratio_sq - 1) / CHI)
+delta_f_calculado = SQRT_IMPEDANCE.invert(v_obs_real_enana, v_bar_enana)
 
 print(f"Observado: {v_obs_real_enana} km/s | Bariónico: {v_bar_enana} km/s")
 print(f"Delta_F Recuperado: {delta_f_calculado:.3f}")
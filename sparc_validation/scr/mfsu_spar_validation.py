@@ -1,8 +1,17 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 import math
 
+# Lector SPARC y registros tipados compartidos con core.processor (raíz del repositorio).
+# La ruta sólo se añade al ejecutar el archivo como script; al
+# importarlo como módulo, core ya debe ser importable.
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from core.sparc_io import read_rotmod, baryonic_velocity
+from core.registers import SCHEMAS, write_register
+
 # CONSTANTES MAESTRAS
 CHI = 12.65
 DELTA_F_ORIGINAL = 0.921
@@ -17,12 +26,13 @@ if os.path.exists(directorio):
     for nombre in archivos:
         ruta = os.path.join(directorio, nombre)
         try:
-            df = pd.read_csv(ruta, sep=r'\s+', skiprows=3, header=None)
-            df = df.dropna(subset=[1, 3, 4])
+            curva = read_rotmod(ruta)
+            validas = ~(np.isnan(curva['v_obs']) | np.isnan(curva['v_gas']) | np.isnan(curva['v_disk']))
+            ultima = np.flatnonzero(validas)[-1]
             
             # 1. Datos Crudos
-            v_obs = df[1].iloc[-1]
-            v_bar = np.sqrt(df[3]**2 + df[4]**2 + df[5].fillna(0)**2).iloc[-1]
+            v_obs = curva['v_obs'][ultima]
+            v_bar = baryonic_velocity(curva)[ultima]
             
             # 2. Predicción Rama Original (Tu constante 0.921)
             v_mfsu_0921 = v_bar * FACTOR_O_0921
@@ -57,5 +67,5 @@ if os.path.exists(directorio):
     print("--- REGISTRO MAESTRO DE IMPEDANCIA FRACTAL (175 GALAXIAS) ---")
     print(df_maestro.to_string(index=False))
     
-    df_maestro.to_csv('REGISTRO_MAESTRO_MFSU_175.csv', index=False)
+    write_register(df_maestro, 'REGISTRO_MAESTRO_MFSU_175.csv', SCHEMAS['sparc'])
     print("\n✅ Registro 'REGISTRO_MAESTRO_MFSU_175.csv' generado con éxito.")
@@ -0,0 +1,26 @@
+import os
+import sys
+import importlib.util
+from importlib.machinery import SourceFileLoader
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# core y los scripts se importan desde la raíz del repositorio (como en benchmarks/)
+sys.path.insert(0, ROOT)
+
+_scripts = {}
+
+@pytest.fixture(scope='session')
+def load_script():
+    """Importa uno de los scripts del repositorio (GAIA/, FERMI/, ATLAS31/...) por ruta."""
+    def load(relative_path):
+        if relative_path not in _scripts:
+            path = os.path.join(ROOT, relative_path)
+            name = 'test_' + os.path.splitext(os.path.basename(path))[0].lower()
+            loader = SourceFileLoader(name, path)
+            module = importlib.util.module_from_spec(importlib.util.spec_from_loader(name, loader))
+            sys.modules[name] = module
+            loader.exec_module(module)
+            _scripts[relative_path] = module
+        return _scripts[relative_path]
+    return load
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+from scipy import ndimage, stats
+
+ATLAS = 'ATLAS31/COLABVERSION_ATLAS.PY'
+
+@pytest.fixture(scope='module')
+def analyzer(load_script):
+    return load_script(ATLAS).MFSURealCometAnalysis(verbose=False)
+
+def _frame(shape=(97, 131), seed=0):
+    """Coma gaussiana con ruido cuantizado (muchos empates) y algunas estrellas."""
+    rng = np.random.default_rng(seed)
+    y, x = np.indices(shape)
+    image = 200 * np.exp(-((x - 60)**2 + (y - 45)**2) / (2 * 25**2))
+    image = np.round(image + rng.normal(0, 8, shape))
+    for sy, sx in rng.integers(0, min(shape), (12, 2)):
+        image[sy:sy + 2, sx:sx + 3] += 300
+    return image
+
+def _box_loop(binary, box_size, occupancy=0.05):
+    # Bucle por caja anterior a compute_box_occupancy
+    h, w = binary.shape
+    occupied = 0
+    for iy in range(h // box_size):
+        for ix in range(w // box_size):
+            box_data = binary[iy * box_size:(iy + 1) * box_size, ix * box_size:(ix + 1) * box_size]
+            if np.sum(box_data) > occupancy * box_size**2:
+                occupied += 1
+    return occupied
+
+def test_box_occupancy_matches_box_loop(analyzer):
+    image = _frame()
+    box_sizes = np.array([1, 2, 3, 4, 5, 7, 10, 16, 24, 33, 97])
+    for threshold in (0, 40, 120):
+        binary = image > threshold
+        expected = [_box_loop(binary, b) for b in box_sizes]
+        np.testing.assert_array_equal(analyzer.compute_box_occupancy(binary, box_sizes), expected)
+
+def _annulus_loop(image, center, radius_bins, star_mask):
+    # Bucle por anillo anterior a compute_radial_profile
+    h, w = image.shape
+    y_coords, x_coords = np.ogrid[:h, :w]
+    radius_pix = np.sqrt((x_coords - center[0])**2 + (y_coords - center[1])**2)
+    sizes, medians, mads = [], [], []
+    for r_inner, r_outer in zip(radius_bins[:-1], radius_bins[1:]):
+        annulus_data = image[(radius_pix >= r_inner) & (radius_pix < r_outer) & (~star_mask)]
+        sizes.append(len(annulus_data))
+        median = np.median(annulus_data) if len(annulus_data) else np.nan
+        medians.append(median)
+        mads.append(np.median(np.abs(annulus_data - median)) if len(annulus_data) else np.nan)
+    return np.array(sizes), np.array(medians), np.array(mads)
+
+@pytest.mark.parametrize('center, radius_bins', [
+    ((60, 45), np.arange(0, 70, 5.0)),                      # radios enteros en los bordes
+    ((60.3, 44.7), np.logspace(np.log10(3), np.log10(80), 13)),
+    ((5, 5), np.array([0.0, 1.0, 1.5, 200.0, 300.0])),      # anillos vacíos
+])
+def test_radial_profile_matches_annulus_loop(analyzer, center, radius_bins):
+    image = _frame()
+    star_mask = image > 250
+    expected = _annulus_loop(image, center, radius_bins, star_mask)
+    got = analyzer.compute_radial_profile(image, center, radius_bins, exclude_mask=star_mask)
+    for g, e in zip(got, expected):
+        np.testing.assert_array_equal(g, e)
+
+def _star_loop(bright_points):
+    # Bucle por objeto anterior a build_star_mask
+    star_mask = np.zeros(bright_points.shape, dtype=bool)
+    labeled, n_objects = ndimage.label(bright_points)
+    for i in range(1, n_objects + 1):
+        obj_mask = labeled == i
+        if 1 < obj_mask.sum() < 50:
+            star_mask |= ndimage.binary_dilation(obj_mask, iterations=3)
+    return star_mask, n_objects
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_star_mask_matches_per_object_dilation(analyzer, seed):
+    # Puntos sueltos (tamaño 1), estrellas pequeñas, objetos grandes y contacto con el borde
+    bright_points = np.random.default_rng(seed).random((80, 90)) > 0.93
+    bright_points[10:20, 10:20] = True
+    bright_points[0:3, 40:44] = True
+    star_mask, n_objects = analyzer.build_star_mask(bright_points)
+    expected_mask, expected_n = _star_loop(bright_points)
+    assert n_objects == expected_n
+    np.testing.assert_array_equal(star_mask, expected_mask)
+
+def test_threshold_sweep_matches_per_threshold_counting(analyzer):
+    image = _frame()
+    image[30:33, 70:72] = np.nan
+    star_mask, _ = analyzer.build_star_mask(image > 250)
+    thresholds = np.array([-10.0, 0.0, 20.0, 37.0, 80.0, 150.5, 1000.0])  # incluye valores de píxel
+    sweep = analyzer.threshold_sweep(image, star_mask, thresholds)
+
+    # Recuento por umbral con el bucle por caja y ajuste con stats.linregress
+    log_scales = np.log10(sweep['scales'])
+    for i, threshold in enumerate(thresholds):
+        binary = (image > threshold) & ~star_mask
+        counts = [_box_loop(binary, b) for b in sweep['scales']]
+        np.testing.assert_array_equal(sweep['counts'][i], counts)
+        log_counts = np.log10(np.maximum(1, counts))
+        fit = stats.linregress(log_scales, log_counts)
+        np.testing.assert_allclose(sweep['df'][i], -fit.slope, rtol=1e-10, atol=1e-12)
+        if np.ptp(log_counts) == 0:
+            # N(s) plano: linregress da NaN, el barrido R² = 0 y error 0
+            assert sweep['r_squared'][i] == 0 and sweep['df_error'][i] == 0
+            continue
+        np.testing.assert_allclose(sweep['df_error'][i], fit.stderr, rtol=1e-8, atol=1e-12)
+        np.testing.assert_allclose(sweep['r_squared'][i], fit.rvalue**2, rtol=1e-10, atol=1e-12)
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+from core.engine import (calculate_precision, calculate_precision_batch, extract_dna,
+                         extract_dna_batch, predict_velocity, predict_velocity_batch)
+
+def _velocities():
+    rng = np.random.default_rng(2)
+    v_obs = rng.uniform(20, 300, 200)
+    v_bar = rng.uniform(10, 250, 200)
+    v_bar[::25] = 0.0
+    v_bar[3] = -5.0
+    v_obs[10::40] = 0.0
+    return v_obs, v_bar
+
+def test_batch_matches_scalar_loop():
+    v_obs, v_bar = _velocities()
+    delta_f = np.linspace(0.3, 1.0, len(v_bar))
+    pred = [predict_velocity(b, d) for b, d in zip(v_bar, delta_f)]
+    dna = [extract_dna(o, b) if o > 0 or b <= 0 else np.nan for o, b in zip(v_obs, v_bar)]
+    prec = [calculate_precision(o, p) for o, p in zip(v_obs, pred)]
+    np.testing.assert_allclose(predict_velocity_batch(v_bar, delta_f), pred, rtol=1e-14)
+    np.testing.assert_allclose(extract_dna_batch(v_obs, v_bar), dna, rtol=1e-14, atol=1e-15)
+    np.testing.assert_allclose(calculate_precision_batch(v_obs, pred), prec, rtol=1e-14, atol=1e-12)
+
+def test_scalars_use_the_scalar_path():
+    assert predict_velocity_batch(120.0) == predict_velocity(120.0)
+    assert extract_dna_batch(np.float64(150.0), 90.0) == extract_dna(150.0, 90.0)
+    assert calculate_precision_batch(0.0, 10.0) == 0
+
+def test_batch_keeps_series_index_and_mask():
+    v_obs, v_bar = _velocities()
+    series = pd.Series(v_bar[:5], index=list('abcde'))
+    assert list(predict_velocity_batch(series).index) == list('abcde')
+    masked = np.ma.MaskedArray(v_obs[:5], mask=[0, 1, 0, 0, 1])
+    out = extract_dna_batch(masked, v_bar[:5])
+    assert np.ma.isMaskedArray(out) and out.mask.tolist() == [False, True, False, False, True]
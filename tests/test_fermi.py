@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+MERGE = 'FERMI/src/Master_Merge_MFSU.py'
+
+def _maps(seed=4):
+    rng = np.random.default_rng(seed)
+    # Radios en pasos de 0.5 kpc: repetidos y consultas a mitad de camino (empates)
+    radius = rng.integers(0, 50, 120) * 0.5
+    radius[[7, 40]] = np.nan
+    df_gaia = pd.DataFrame({'radius_kpc': radius, 'delta_F_calculado': rng.uniform(0.85, 1.0, 120)},
+                           index=rng.permutation(np.arange(1000, 1120)))
+    distancia = np.r_[rng.integers(0, 110, 80) * 0.25, -3.0, 40.0, rng.uniform(5, 25, 40)]
+    df_fermi = pd.DataFrame({'grb_id': [f'GRB{i}' for i in range(len(distancia))],
+                             'e_peak_kev': rng.uniform(50, 900, len(distancia)),
+                             'distancia_recorrida_kpc': distancia})
+    return df_gaia, df_fermi
+
+def test_merge_matches_idxmin_loop(load_script):
+    merge = load_script(MERGE)
+    df_gaia, df_fermi = _maps()
+
+    # Búsqueda evento a evento anterior a RadiusIndex
+    def obtener_delta_contextual(r):
+        idx = (df_gaia['radius_kpc'] - r).abs().idxmin()
+        return df_gaia.loc[idx, 'delta_F_calculado']
+    expected = df_fermi.copy()
+    expected['delta_F_red'] = expected['distancia_recorrida_kpc'].apply(obtener_delta_contextual)
+    expected['E_fuente_estimada'] = expected['e_peak_kev'] / (merge.CHI**(1 - expected['delta_F_red']))
+
+    pd.testing.assert_frame_equal(merge.cruzar_fermi_gaia(df_fermi.copy(), df_gaia), expected)
+
+def test_merge_interpolation_matches_np_interp(load_script):
+    merge = load_script(MERGE)
+    df_gaia, df_fermi = _maps()
+    # Un valor por radio (el de la fila que aparece primero), en orden de radio
+    mapa = df_gaia.dropna().drop_duplicates('radius_kpc').sort_values('radius_kpc')
+    out = merge.cruzar_fermi_gaia(df_fermi.copy(), df_gaia, interpolar=True)
+    np.testing.assert_array_equal(out['delta_F_red'],
+                                  np.interp(df_fermi['distancia_recorrida_kpc'],
+                                            mapa['radius_kpc'], mapa['delta_F_calculado']))
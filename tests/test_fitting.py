@@ -0,0 +1,24 @@
+import pytest
+from core.fitting import fit_sparc_directory, load_sparc_curves
+from core.uncertainty import bootstrap_sparc_directory
+
+def _unreadable_directory(tmp_path):
+    (tmp_path / 'BAD_rotmod.dat').write_text('a\nb\nc\nfoo bar baz\n')
+    return str(tmp_path)
+
+def test_no_valid_curves_reports_failures(tmp_path):
+    directory = _unreadable_directory(tmp_path)
+    names, offsets, flat, failures = load_sparc_curves([directory + '/BAD_rotmod.dat'],
+                                                       return_failures=True)
+    assert names == [] and offsets.tolist() == [0] and len(flat['v_bar']) == 0
+    fit, fit_failures = fit_sparc_directory(directory, return_failures=True)
+    boot, boot_failures = bootstrap_sparc_directory(directory, n_realizations=5, seed=0,
+                                                    return_failures=True)
+    assert len(fit) == 0 and 'DELTA_F_FIT' in fit.columns
+    assert len(boot) == 0 and 'ci_low' in boot.columns
+    assert [f['PATH'] for f in fit_failures] == [f['PATH'] for f in boot_failures] == \
+        [f['PATH'] for f in failures]
+
+def test_no_valid_curves_raises_without_failures(tmp_path):
+    with pytest.raises(ValueError):
+        fit_sparc_directory(_unreadable_directory(tmp_path))
@@ -0,0 +1,35 @@
+import os
+import numpy as np
+import pandas as pd
+
+GAIA = 'GAIA/scr/GAIA_MFSU_VALIDATION.py'
+
+def _catalog(path):
+    df = pd.read_csv(os.path.join(os.path.dirname(path), '..', 'DATA', 'gaia_massive_events.csv'),
+                     nrows=200)
+    df.loc[[3, 50], 'v_bar_kms'] = 0.0  # delta_F no finito
+    return df
+
+def test_streaming_matches_in_memory(load_script, tmp_path, monkeypatch):
+    gaia = load_script(GAIA)
+    monkeypatch.chdir(tmp_path)
+    _catalog(gaia.__file__).to_csv('catalogo.csv', index=False)
+
+    analisis = gaia.analizar_mfsu_gaia('catalogo.csv')
+    resumen = gaia.analizar_mfsu_gaia_streaming('catalogo.csv', 'streaming.csv', chunksize=37)
+    pd.testing.assert_frame_equal(pd.read_csv('streaming.csv'),
+                                  pd.read_csv('resultados_mfsu_gaia.csv'))
+    media, n_excluidos = gaia.resumen_delta_f(analisis['delta_F_calculado'])
+    assert resumen['n_filas'] == len(analisis) and resumen['n_invalidos'] == n_excluidos == 2
+    np.testing.assert_allclose(resumen['media'], media, rtol=1e-12)
+
+def test_streaming_empty_input_truncates_output(load_script, tmp_path, monkeypatch):
+    gaia = load_script(GAIA)
+    monkeypatch.chdir(tmp_path)
+    _catalog(gaia.__file__).head(0).to_csv('vacio.csv', index=False)
+    with open('salida.csv', 'w') as f:
+        f.write('resultado,anterior\n1,2\n')
+    resumen = gaia.analizar_mfsu_gaia_streaming('vacio.csv', 'salida.csv')
+    assert resumen['n_filas'] == 0
+    with open('salida.csv') as f:
+        assert 'anterior' not in f.read()
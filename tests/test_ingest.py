@@ -0,0 +1,42 @@
+import numpy as np
+from core.ingest import GaiaMap, RollingWindow
+from core.radius_index import RadiusIndex
+
+def _reference():
+    rng = np.random.default_rng(7)
+    # Radios redondeados para que haya repetidos y empates de distancia
+    radius = np.round(rng.uniform(0, 20, 200), 1)
+    radius[::17] = np.nan
+    delta_f = rng.uniform(0.9, 1.0, 200)
+    queries = np.r_[np.round(rng.uniform(-2, 22, 300), 2), radius[:50], np.nan]
+    return radius, delta_f, queries
+
+def test_gaia_map_matches_radius_index():
+    radius, delta_f, queries = _reference()
+    index = RadiusIndex(radius, delta_f)
+    built = GaiaMap(radius, delta_f)
+    incremental = GaiaMap()
+    for r, value in zip(radius, delta_f):
+        incremental.add(r, value)
+    for interpolate in (False, True):
+        expected = index.lookup(queries, interpolate=interpolate)
+        for gaia in (built, incremental):
+            got = np.array([gaia.lookup(q, interpolate=interpolate) for q in queries])
+            np.testing.assert_array_equal(got, expected)
+
+def test_gaia_map_all_nan():
+    gaia = GaiaMap([np.nan, np.nan], [1.0, 2.0])
+    assert len(gaia) == 0 and np.isnan(gaia.lookup(1.0))
+    gaia.add([1.0, 2.0], [3.0, 4.0])
+    assert gaia.lookup(1.2) == 3.0
+
+def test_rolling_window_matches_brute_force():
+    values = np.random.default_rng(3).normal(size=500)
+    window = RollingWindow(32)
+    for i, value in enumerate(values):
+        window.push(value)
+        last = values[max(0, i - 31):i + 1]
+        np.testing.assert_array_equal(window.values(), last)
+        assert window.min == last.min() and window.max == last.max()
+        np.testing.assert_allclose([window.mean, window.std], [last.mean(), last.std()],
+                                   rtol=1e-9, atol=1e-12)
@@ -0,0 +1,21 @@
+import numpy as np
+from core.processor import iter_sparc_directory
+
+def _sparc_directory(path, n=40):
+    rng = np.random.default_rng(0)
+    for g in range(n):
+        rows = np.column_stack([np.arange(1, 11) * 0.5, rng.uniform(80, 250, 10),
+                                rng.uniform(2, 10, 10), rng.uniform(10, 60, 10),
+                                rng.uniform(40, 150, 10), rng.uniform(0, 50, 10)])
+        with open(path / f'G{g:03d}_rotmod.dat', 'w') as f:
+            f.write('# Distance = 10 Mpc\n# Rad Vobs errV Vgas Vdisk Vbul\n# kpc km/s\n')
+            np.savetxt(f, rows, fmt='%.3f')
+    (path / 'BAD_rotmod.dat').write_text('# a\n# b\n# c\n')
+    return str(path)
+
+def test_pool_matches_serial(tmp_path):
+    directory = _sparc_directory(tmp_path)
+    serial = list(iter_sparc_directory(directory, workers=1, chunk_size=7))
+    pooled = list(iter_sparc_directory(directory, workers=2, chunk_size=7))
+    assert [len(rows) + len(failures) for rows, failures in pooled] == [7] * 5 + [6]
+    assert pooled == serial
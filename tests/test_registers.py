@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from core.registers import SCHEMAS, read_register, write_register
+
+def _frame():
+    return pd.DataFrame({
+        'grb_id': ['GRB1', None, 'GRB3', np.nan],
+        'e_peak_kev': [100.0, np.nan, 250.0, 80.0],
+        'fluence_erg_cm2': [1e-6, 2e-6, np.nan, 4e-6],
+        'radius_kpc': [1.0, 2.0, 3.0, 4.0],
+    })
+
+def test_npcol_round_trip_matches_csv(tmp_path):
+    df = _frame()
+    schema = {'grb_id': 'str', 'e_peak_kev': 'float64', 'fluence_erg_cm2': 'float64',
+              'radius_kpc': 'float64'}
+    write_register(df, str(tmp_path / 'r.csv'), schema=schema)
+    write_register(df, str(tmp_path / 'r.npcol'), schema=schema)
+    from_csv = read_register(str(tmp_path / 'r.csv'))
+    from_npcol = read_register(str(tmp_path / 'r.npcol'), mmap=False)
+    assert from_npcol['grb_id'].isna().tolist() == [False, True, False, True]
+    assert from_npcol['grb_id'].dropna().tolist() == ['GRB1', 'GRB3']
+    for column in df.columns:
+        missing = from_csv[column].isna()
+        assert from_npcol[column].isna().equals(missing)
+        assert from_npcol[column][~missing].tolist() == from_csv[column][~missing].tolist()
+
+def test_npcol_without_missing_values(tmp_path):
+    df = pd.DataFrame({'GALAXY': ['A', 'B'], 'V_BAR': [1.0, 2.0]})
+    write_register(df, str(tmp_path / 'r.npcol'))
+    out = read_register(str(tmp_path / 'r.npcol'), mmap=False)
+    assert out['GALAXY'].tolist() == ['A', 'B'] and out['V_BAR'].tolist() == [1.0, 2.0]
@@ -0,0 +1,14 @@
+import numpy as np
+from core.scan import ligo_catalog, scan_grid
+
+def test_ligo_relative_residual_uses_abs_obs():
+    rng = np.random.default_rng(1)
+    obs = rng.uniform(-0.5, 0.5, 50)
+    x = rng.uniform(0.01, 0.1, 50)
+    chi, delta_f = np.array([2.0, 5.0]), np.array([-0.1, 0.0, 0.2])
+    scan = scan_grid({'ligo': ligo_catalog(obs, x, np.ones(50))}, chi, delta_f)
+    for row in scan.itertuples():
+        pred = row.DELTA_F + np.log(row.CHI) * x
+        expected = (1 - np.mean(np.abs(obs - pred) / np.abs(obs))) * 100
+        np.testing.assert_allclose(row.LIGO_PRECISION, expected, rtol=1e-12)
+        assert row.LIGO_PRECISION <= 100
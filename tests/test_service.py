@@ -0,0 +1,41 @@
+import asyncio
+import numpy as np
+from core.service import PredictionService, _dispatch, serve
+
+def test_empty_lists_resolve():
+    async def run():
+        async with PredictionService() as service:
+            result = await asyncio.wait_for(service.call('extract_dna', v_obs=[], v_bar=[]), 1)
+            status, payload, _ = await asyncio.wait_for(
+                _dispatch(service, 'POST', '/extract_dna', b'{"v_obs": [], "v_bar": []}'), 1)
+            return result, status, payload
+    result, status, payload = asyncio.run(run())
+    assert isinstance(result, np.ndarray) and result.shape == (0,)
+    assert status == 200 and payload == {'result': []}
+
+def test_malformed_requests_get_400():
+    async def request(port, raw):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(raw)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 1)
+        writer.close()
+        return response
+
+    async def run():
+        service = PredictionService()
+        server = await serve(service, port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return [await request(port, raw) for raw in (
+                b'GARBAGE\r\n\r\n',
+                b'POST /extract_dna HTTP/1.1\r\nContent-Length: abc\r\n\r\n',
+                b'POST /extract_dna HTTP/1.1\r\nContent-Length: -5\r\n\r\n',
+            )]
+        finally:
+            server.close()
+            await server.wait_closed()
+            await service.close()
+
+    for response in asyncio.run(run()):
+        assert response.startswith(b'HTTP/1.1 400 Bad Request')
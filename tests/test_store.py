@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+from core.store import RegisterStore, SortedIndex
+
+def _frame(n=300):
+    rng = np.random.default_rng(5)
+    delta_f = np.round(rng.uniform(0.8, 1.0, n), 2)  # muchos empates
+    delta_f[::23] = np.nan
+    return pd.DataFrame({
+        'GALAXY_ID': [f'G{i:03d}' for i in range(n)],
+        'REDSHIFT_Z': np.round(rng.uniform(2, 13, n), 2),
+        'DELTA_F_REAL': delta_f,
+        'STATUS': rng.choice(['ORIGINAL', 'BRANCH'], n),
+    })
+
+@pytest.mark.parametrize('decimals', [None, 2])
+def test_top_matches_stable_sort(decimals):
+    keys = _frame()['DELTA_F_REAL']
+    index = SortedIndex(keys.to_numpy(np.float32) if decimals else keys.to_numpy(), decimals)
+    valid = keys.dropna()
+    for k in (0, 1, 7, 40, len(valid), len(keys) + 5):
+        largest = valid.sort_values(ascending=False, kind='stable').index[:k]
+        smallest = valid.sort_values(kind='stable').index[:k]
+        np.testing.assert_array_equal(index.top(k), largest)
+        np.testing.assert_array_equal(index.top(k, largest=False), smallest)
+
+def test_query_matches_pandas(tmp_path):
+    df = _frame()
+    path = str(tmp_path / 'jwst.csv')
+    df.to_csv(path, index=False)
+    store = RegisterStore().load('jwst', path, index=['DELTA_F_REAL', 'REDSHIFT_Z'])
+
+    got = store.query('jwst', {'DELTA_F_REAL': (0.85, 0.95), 'REDSHIFT_Z': (4, None)})
+    mask = df['DELTA_F_REAL'].between(0.85, 0.95) & (df['REDSHIFT_Z'] >= 4)
+    np.testing.assert_array_equal(got.index, df.index[mask])
+    np.testing.assert_array_equal(got['DELTA_F_REAL'], df.loc[mask, 'DELTA_F_REAL'])
+
+    expected = df.dropna(subset=['DELTA_F_REAL']).sort_values(
+        'DELTA_F_REAL', ascending=False, kind='stable').index[:10]
+    np.testing.assert_array_equal(store.query('jwst', order_by='DELTA_F_REAL', k=10).index, expected)
+    np.testing.assert_array_equal(store.top('jwst', 'DELTA_F_REAL', 10), expected)
@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+import pytest
+from core.synthetic import write_catalog
+
+def _generate(n, rng, inicio=0, total=None):
+    return {'ID': np.arange(inicio, inicio + n), 'VALUE': rng.uniform(0, 1, n)}
+
+@pytest.mark.parametrize('ext', ['csv', 'parquet'])
+def test_empty_catalog_writes_header(tmp_path, ext):
+    if ext == 'parquet':
+        pytest.importorskip('pyarrow')
+    path = str(tmp_path / f'catalog.{ext}')
+    assert write_catalog(path, _generate, 0, seed=0) == 0
+    df = pd.read_csv(path) if ext == 'csv' else pd.read_parquet(path)
+    assert list(df.columns) == ['ID', 'VALUE'] and len(df) == 0
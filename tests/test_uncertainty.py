@@ -0,0 +1,9 @@
+from core.uncertainty import bootstrap_curves, delta_f_velocity_mc
+
+COLUMNS = ['estimate', 'mean', 'std', 'ci_low', 'ci_high', 'n_valid']
+
+def test_empty_catalog():
+    mc = delta_f_velocity_mc([], [], n_realizations=10, seed=0)
+    boot = bootstrap_curves([0], [], [], n_realizations=10, seed=0)
+    for out in (mc, boot):
+        assert list(out.columns) == COLUMNS and len(out) == 0